@@ -2,10 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from typing import List
 
 import pydantic
-from app.schemas.profiles import ProfileExistsRequest, ProfileExistsResponse, ProfileCreateRequest, ProfileCreateResponse, Profile, ProfileDeleteRequest
+from app.schemas.profiles import ProfileExistsRequest, ProfileExistsResponse, ProfileCreateRequest, ProfileCreateResponse, Profile, ProfileDeleteRequest, ProfileWrite
 from app.services.embeddings import generate_embedding
 import app.services.supabase as supabase
+from app.services.sharding import get_search_coordinator, shard_row
+from app.services.embedding_models import get_embedding_model_state
+from app.services.profile_cards import profile_card_store
 import uuid
+import asyncio
 from datetime import datetime
 import logging
 import requests
@@ -33,7 +37,13 @@ async def delete_user(
     profile_data: ProfileDeleteRequest,
 ):
     print(f"{delete_user} profile_data: {profile_data}")
-    return delete_user_service(profile_data)
+    response = delete_user_service(profile_data)
+    if settings.PROFILE_CARD_STORE_ENABLED:
+        profile_card_store.remove_user(profile_data.user_id)
+    coordinator = get_search_coordinator()
+    if coordinator:
+        await coordinator.remove_user(profile_data.user_id)
+    return response
 
 def check_user_exists_service(profile_data: ProfileExistsRequest):
     user_exists = supabase.check_user_exists(profile_data.user_id)
@@ -97,10 +107,29 @@ async def create_user_service(profile_data: ProfileCreateRequest):
         created_at=datetime.now(),
         updated_at=datetime.now()
     )
-    # generate an embedding for the profile
-    embedding = await generate_embedding(profile)
-    # store the profile data in the linkedin_profiles table
-    supabase.store_profile_in_supabase(profile_data.user_id, profile, embedding, "linkedin_profiles")
+    # generate an embedding for the profile with the model currently serving searches;
+    # while a shadow index is being built, new profiles need a shadow embedding too
+    model_state = get_embedding_model_state()
+    embedding_models = [model_state.active_model]
+    if model_state.shadow_model:
+        embedding_models.append(model_state.shadow_model)
+    embeddings = await asyncio.gather(*(generate_embedding(profile, model) for model in embedding_models))
+    embedding = embeddings[0]
+    # store the profile and its embeddings in the linkedin_profiles schema in one call
+    stored_id = supabase.store_profiles_batch(
+        [ProfileWrite(profile=profile, embeddings=dict(zip(embedding_models, embeddings)))],
+        "linkedin_profiles",
+    )[0]
+    # an existing profile for this user keeps its id
+    profile = profile.model_copy(update={"id": stored_id})
+    # keep the in-memory profile cards and search shards in step with the database
+    if settings.PROFILE_CARD_STORE_ENABLED:
+        profile_card_store.upsert(profile.model_dump())
+    coordinator = get_search_coordinator()
+    if coordinator and coordinator.embedding_model == model_state.active_model:
+        await coordinator.upsert_profile(
+            shard_row(profile.model_dump(mode="json"), embedding, settings.PROFILE_CARD_STORE_ENABLED)
+        )
     # return the user data
     return {"user_id": profile_data.user_id,
             "linkedin_profile": profile}
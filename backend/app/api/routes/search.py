@@ -1,14 +1,41 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from typing import Awaitable, Callable, List
 
+from app.core.config import settings
+from app.core.security import get_current_user_id
 from app.schemas.search import SearchQuery, SearchResult
-from app.services.search import search_profiles
+from app.services.search import search_profiles, search_with_plan
+from app.services.query_planning import query_planner
+from app.services.quota import search_quota, search_admission, QuotaExceededError, OverloadedError
 
 router = APIRouter()
 
+async def run_metered_search(user_id: str, search: Callable[[], Awaitable[List[SearchResult]]]):
+    """Run a search behind the user's quota and the admission queue"""
+    try:
+        # Reserves the search; it is refunded below if the search fails
+        await search_quota.check(user_id)
+    except QuotaExceededError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN if e.monthly else status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e),
+        )
+    
+    try:
+        async with search_admission.admit(search_quota.priority(user_id)):
+            return await search()
+    except OverloadedError as e:
+        search_quota.refund(user_id)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    except BaseException:
+        # Only successful searches count against the quota
+        search_quota.refund(user_id)
+        raise
+
 @router.post("/semantic-search", response_model=List[SearchResult])
 async def semantic_search_endpoint(
     query: SearchQuery,
+    user_id: str = Depends(get_current_user_id),
 ):
     """
     Search for LinkedIn profiles using semantic search
@@ -17,5 +44,20 @@ async def semantic_search_endpoint(
     # This would be implemented with a check against the database
     # For now, assume profiles are indexed
     
-    results = await search_profiles(query.query)
-    return results
+    match_count = min(query.limit or 10, settings.SEARCH_MAX_RESULTS)
+    return await run_metered_search(user_id, lambda: search_profiles(query.query, match_count))
+
+@router.post("/advanced-search", response_model=List[SearchResult])
+async def advanced_search_endpoint(
+    query: SearchQuery,
+    user_id: str = Depends(get_current_user_id),
+):
+    """
+    Search for LinkedIn profiles by decomposing the query into sections,
+    filters and key phrases first
+    """
+    async def search():
+        plan = await query_planner.plan(query.query)
+        return await search_with_plan(plan, min(query.limit or 10, settings.SEARCH_MAX_RESULTS))
+    
+    return await run_metered_search(user_id, search)
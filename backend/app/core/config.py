@@ -29,11 +29,56 @@ class Settings(BaseSettings):
     # Supabase settings (replacing Pinecone)
     SUPABASE_URL: str = os.getenv("SUPABASE_URL", "")
     SUPABASE_SERVICE_ROLE_KEY: str = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "")
+    # Signs the supabaseAccessToken the frontend puts in the NextAuth session
+    SUPABASE_JWT_SECRET: str = os.getenv("SUPABASE_JWT_SECRET", "")
     
     # OpenAI settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     EMBEDDING_MODEL: str = "text-embedding-3-small"
     EMBEDDING_DIMENSION: int = 1536  # Dimension for OpenAI embeddings
+    # The model actually serving searches lives in linkedin_profiles.embedding_model_state;
+    # EMBEDDING_MODEL/EMBEDDING_DIMENSION are only the fallback when it cannot be read
+    EMBEDDING_MODEL_STATE_TTL_SECONDS: float = float(os.getenv("EMBEDDING_MODEL_STATE_TTL_SECONDS", "30"))
+    EMBEDDING_DUAL_READ_SAMPLE_RATE: float = float(os.getenv("EMBEDDING_DUAL_READ_SAMPLE_RATE", "0.0"))
+    
+    # Sharded search settings (0 shards = query Supabase directly)
+    SEARCH_SHARD_COUNT: int = int(os.getenv("SEARCH_SHARD_COUNT", "0"))
+    SEARCH_SHARD_REPLICAS: int = int(os.getenv("SEARCH_SHARD_REPLICAS", "2"))
+    SEARCH_SHARD_TIMEOUT_SECONDS: float = float(os.getenv("SEARCH_SHARD_TIMEOUT_SECONDS", "2.0"))
+    SEARCH_SHARD_HEDGE_AFTER_SECONDS: float = float(os.getenv("SEARCH_SHARD_HEDGE_AFTER_SECONDS", "0.15"))
+    
+    # Executor settings (0 workers = let the executor pick from the CPU count)
+    EXECUTOR_THREAD_WORKERS: int = int(os.getenv("EXECUTOR_THREAD_WORKERS", "0"))
+    EXECUTOR_PROCESS_WORKERS: int = int(os.getenv("EXECUTOR_PROCESS_WORKERS", "0"))
+    EXECUTOR_MAX_HEAVY_TASKS: int = int(os.getenv("EXECUTOR_MAX_HEAVY_TASKS", "8"))
+    # Upper bound on a search's limit; results past HYDRATION_OFFLOAD_THRESHOLD
+    # are hydrated on the process pool
+    SEARCH_MAX_RESULTS: int = int(os.getenv("SEARCH_MAX_RESULTS", "500"))
+    HYDRATION_OFFLOAD_THRESHOLD: int = int(os.getenv("HYDRATION_OFFLOAD_THRESHOLD", "200"))
+    HYDRATION_CHUNK_SIZE: int = int(os.getenv("HYDRATION_CHUNK_SIZE", "100"))
+    
+    # Search quota and admission control settings
+    DEFAULT_MONTHLY_SEARCH_LIMIT: int = int(os.getenv("DEFAULT_MONTHLY_SEARCH_LIMIT", "50"))
+    SEARCH_RATE_PER_MINUTE: float = float(os.getenv("SEARCH_RATE_PER_MINUTE", "10"))
+    SEARCH_BURST: int = int(os.getenv("SEARCH_BURST", "5"))
+    SEARCH_QUOTA_FLUSH_SECONDS: float = float(os.getenv("SEARCH_QUOTA_FLUSH_SECONDS", "5.0"))
+    SEARCH_QUOTA_REFRESH_SECONDS: float = float(os.getenv("SEARCH_QUOTA_REFRESH_SECONDS", "300.0"))
+    SEARCH_MAX_CONCURRENT: int = int(os.getenv("SEARCH_MAX_CONCURRENT", "32"))
+    SEARCH_MAX_QUEUE: int = int(os.getenv("SEARCH_MAX_QUEUE", "128"))
+    
+    # Advanced search query planning settings
+    QUERY_PLANNER_MODEL: str = os.getenv("QUERY_PLANNER_MODEL", "gpt-4o-mini-2024-07-18")
+    QUERY_PLAN_CACHE_SIZE: int = int(os.getenv("QUERY_PLAN_CACHE_SIZE", "1024"))
+    QUERY_PLAN_CACHE_TTL_SECONDS: float = float(os.getenv("QUERY_PLAN_CACHE_TTL_SECONDS", "3600"))
+    
+    # Keep profile display fields in memory so search hits are hydrated without a DB fetch
+    PROFILE_CARD_STORE_ENABLED: bool = os.getenv("PROFILE_CARD_STORE_ENABLED", "false").lower() == "true"
+    # How often the card store and search shards pick up profiles written or
+    # deleted outside the backend (0 = never). Each sync reads only profiles
+    # updated since the last one, re-reading OVERLAP seconds before the newest
+    # updated_at seen because writers stamp it with their own clocks
+    SEARCH_INDEX_REFRESH_SECONDS: float = float(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "60"))
+    SEARCH_INDEX_REFRESH_OVERLAP_SECONDS: float = float(os.getenv("SEARCH_INDEX_REFRESH_OVERLAP_SECONDS", "60"))
     
     # Proxycurl settings
     PROXYCURL_API_KEY: str = os.getenv("PROXYCURL_API_KEY", "")
@@ -0,0 +1,42 @@
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+
+def get_current_user_id(authorization: Optional[str] = Header(None)) -> str:
+    """
+    Resolve the calling user from the Supabase access token in the Authorization header
+
+    The frontend signs this token (supabaseAccessToken in the NextAuth
+    session) with SUPABASE_JWT_SECRET; its subject is the user id.
+    """
+    unauthorized = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Not authenticated",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if not authorization or not authorization.lower().startswith("bearer "):
+        raise unauthorized
+    if not settings.SUPABASE_JWT_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="SUPABASE_JWT_SECRET is not configured",
+        )
+
+    try:
+        payload = jwt.decode(
+            authorization[len("bearer "):],
+            settings.SUPABASE_JWT_SECRET,
+            algorithms=[settings.ALGORITHM],
+            audience="authenticated",
+        )
+    except JWTError:
+        raise unauthorized
+
+    user_id = payload.get("sub")
+    if not user_id:
+        raise unauthorized
+    return user_id
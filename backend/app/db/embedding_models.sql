@@ -0,0 +1,155 @@
+-- Model-versioned embeddings.
+-- Every profile_embeddings row is tagged "<model>@<dimensions>" and searches
+-- only ever compare vectors carrying the same tag. embedding_model_state
+-- records which tag serves searches (active), which one is being backfilled
+-- (shadow) and which one a rollback returns to (previous).
+
+-- Allow vectors of different dimensions to live side by side
+ALTER TABLE linkedin_profiles.profile_embeddings
+ALTER COLUMN embedding TYPE VECTOR;
+
+-- Rows written before versioning were ada-002 vectors tagged "openai"
+UPDATE linkedin_profiles.profile_embeddings
+SET embedding_model = 'text-embedding-ada-002@1536'
+WHERE embedding_model = 'openai' OR embedding_model IS NULL;
+
+-- Writers that predate versioning (the frontend signup route) still send
+-- "openai"; tag those rows as the ada-002 vectors they are so they stay searchable
+CREATE OR REPLACE FUNCTION linkedin_profiles.tag_legacy_embedding_model()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.embedding_model = 'openai' OR NEW.embedding_model IS NULL THEN
+    NEW.embedding_model := 'text-embedding-ada-002@1536';
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tag_legacy_embedding_model ON linkedin_profiles.profile_embeddings;
+CREATE TRIGGER tag_legacy_embedding_model
+BEFORE INSERT OR UPDATE OF embedding_model ON linkedin_profiles.profile_embeddings
+FOR EACH ROW EXECUTE FUNCTION linkedin_profiles.tag_legacy_embedding_model();
+
+CREATE TABLE IF NOT EXISTS linkedin_profiles.embedding_model_state (
+  id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+  active_model TEXT NOT NULL,
+  shadow_model TEXT,
+  previous_model TEXT,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO linkedin_profiles.embedding_model_state (id, active_model)
+VALUES (1, 'text-embedding-ada-002@1536')
+ON CONFLICT (id) DO NOTHING;
+
+-- Build an ANN index covering only the vectors of one model tag
+CREATE OR REPLACE FUNCTION linkedin_profiles.create_embedding_model_index(model_tag TEXT)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  dims INT := split_part(model_tag, '@', 2)::INT;
+BEGIN
+  EXECUTE format(
+    'CREATE INDEX IF NOT EXISTS %I ON linkedin_profiles.profile_embeddings '
+    'USING hnsw ((embedding::vector(%s)) vector_cosine_ops) WHERE embedding_model = %L',
+    'profile_embeddings_hnsw_' || left(md5(model_tag), 12), dims, model_tag
+  );
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION linkedin_profiles.start_shadow_embedding_model(model_tag TEXT)
+RETURNS VOID
+LANGUAGE sql
+AS $$
+  UPDATE linkedin_profiles.embedding_model_state
+  SET shadow_model = model_tag, updated_at = now()
+  WHERE id = 1;
+$$;
+
+CREATE OR REPLACE FUNCTION linkedin_profiles.cutover_embedding_model()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE linkedin_profiles.embedding_model_state
+  SET previous_model = active_model,
+      active_model = shadow_model,
+      shadow_model = NULL,
+      updated_at = now()
+  WHERE id = 1 AND shadow_model IS NOT NULL;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'No shadow embedding model to cut over to';
+  END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION linkedin_profiles.rollback_embedding_model()
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE linkedin_profiles.embedding_model_state
+  SET active_model = previous_model,
+      previous_model = active_model,
+      updated_at = now()
+  WHERE id = 1 AND previous_model IS NOT NULL;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'No previous embedding model to roll back to';
+  END IF;
+END;
+$$;
+
+-- Same result shape as search_profiles_by_embedding, restricted to one model tag.
+-- The vector(n) cast matches the per-model partial index built above.
+CREATE OR REPLACE FUNCTION linkedin_profiles.search_profiles_by_embedding_model(
+  query_embedding VECTOR,
+  match_threshold FLOAT,
+  match_count INT,
+  model_tag TEXT
+)
+RETURNS TABLE (
+  id UUID,
+  user_id UUID,
+  linkedin_id TEXT,
+  full_name TEXT,
+  headline TEXT,
+  industry TEXT,
+  location TEXT,
+  profile_url TEXT,
+  profile_picture_url TEXT,
+  summary TEXT,
+  raw_profile_data JSONB,
+  created_at TIMESTAMPTZ,
+  updated_at TIMESTAMPTZ,
+  similarity FLOAT
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  dims INT := split_part(model_tag, '@', 2)::INT;
+BEGIN
+  IF vector_dims(query_embedding) <> dims THEN
+    RAISE EXCEPTION 'Query embedding has % dimensions, model % expects %',
+      vector_dims(query_embedding), model_tag, dims;
+  END IF;
+
+  RETURN QUERY EXECUTE format(
+    'SELECT p.id, p.user_id, p.linkedin_id, p.full_name, p.headline, p.industry, '
+    '       p.location, p.profile_url, p.profile_picture_url, p.summary, '
+    '       p.raw_profile_data, p.created_at, p.updated_at, '
+    '       1 - (e.embedding::vector(%1$s) <=> $1::vector(%1$s)) AS similarity '
+    'FROM linkedin_profiles.profile_embeddings e '
+    'JOIN linkedin_profiles.profiles p ON p.id = e.profile_id '
+    'WHERE e.embedding_model = $4 '
+    '  AND 1 - (e.embedding::vector(%1$s) <=> $1::vector(%1$s)) > $2 '
+    'ORDER BY e.embedding::vector(%1$s) <=> $1::vector(%1$s) '
+    'LIMIT $3',
+    dims
+  ) USING query_embedding, match_threshold, match_count, model_tag;
+END;
+$$;
@@ -8,14 +8,21 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from app.utils.supabase_client import get_supabase_client
 from app.core.config import settings
 
+SQL_SCRIPTS = [
+    "setup_pgvector.sql",
+    "embedding_models.sql",
+    "profile_writes.sql",
+]
+
 def init_db():
     """Initialize the database with pgvector extension and necessary tables"""
     supabase = get_supabase_client()
     
-    # Read SQL setup script
-    script_path = Path(__file__).parent / "setup_pgvector.sql"
-    with open(script_path, "r") as f:
-        sql_script = f.read()
+    # Read SQL setup scripts
+    sql_script = ""
+    for script_path in SQL_SCRIPTS:
+        with open(Path(__file__).parent / script_path, "r") as f:
+            sql_script += f.read() + "\n"
     
     # Execute SQL script
     # Note: In a real implementation, you would need to use a more direct
@@ -0,0 +1,72 @@
+-- Single round-trip profile writes.
+-- Upserts each profile (matched on user_id via the unique_user_profile
+-- constraint), its embeddings (one per model tag) and its section chunks
+-- inside the one transaction the RPC call runs in, so a failure can never
+-- leave a profile without its embedding. Called by the backend's
+-- store_profiles_batch and by the frontend signup route.
+--
+-- payload is a JSON array of:
+--   {"profile": {...profiles row...},
+--    "embeddings": {"<model>@<dimensions>": [floats], ...},
+--    "chunks": [{"chunk_type": "...", "content": "...", "embedding": [floats]}, ...]}
+
+CREATE OR REPLACE FUNCTION linkedin_profiles.upsert_profiles_with_embeddings(payload JSONB)
+RETURNS TABLE (stored_profile_id UUID, stored_user_id UUID)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  item JSONB;
+  profile_row linkedin_profiles.profiles;
+BEGIN
+  FOR item IN SELECT value FROM jsonb_array_elements(payload)
+  LOOP
+    profile_row := jsonb_populate_record(NULL::linkedin_profiles.profiles, item->'profile');
+
+    INSERT INTO linkedin_profiles.profiles AS p (
+      id, user_id, linkedin_id, full_name, headline, industry, location,
+      profile_url, profile_picture_url, summary, raw_profile_data,
+      created_at, updated_at
+    )
+    VALUES (
+      profile_row.id, profile_row.user_id, profile_row.linkedin_id,
+      profile_row.full_name, profile_row.headline, profile_row.industry,
+      profile_row.location, profile_row.profile_url,
+      profile_row.profile_picture_url, profile_row.summary,
+      profile_row.raw_profile_data, COALESCE(profile_row.created_at, now()),
+      COALESCE(profile_row.updated_at, now())
+    )
+    ON CONFLICT (user_id) DO UPDATE
+    SET linkedin_id = EXCLUDED.linkedin_id,
+        full_name = EXCLUDED.full_name,
+        headline = EXCLUDED.headline,
+        industry = EXCLUDED.industry,
+        location = EXCLUDED.location,
+        profile_url = EXCLUDED.profile_url,
+        profile_picture_url = EXCLUDED.profile_picture_url,
+        summary = EXCLUDED.summary,
+        raw_profile_data = EXCLUDED.raw_profile_data,
+        updated_at = EXCLUDED.updated_at
+    -- An existing profile keeps its id so embeddings and connections stay attached
+    RETURNING p.id, p.user_id INTO stored_profile_id, stored_user_id;
+
+    INSERT INTO linkedin_profiles.profile_embeddings (profile_id, embedding, embedding_model, created_at)
+    SELECT stored_profile_id, e.value::TEXT::VECTOR, e.key, now()
+    FROM jsonb_each(COALESCE(item->'embeddings', '{}'::JSONB)) AS e
+    ON CONFLICT (profile_id, embedding_model) DO UPDATE
+    SET embedding = EXCLUDED.embedding,
+        created_at = EXCLUDED.created_at;
+
+    -- Populating a profile_chunks record gives chunk_type its enum type
+    -- (text has no assignment cast to profile_chunk_type)
+    INSERT INTO linkedin_profiles.profile_chunks (profile_id, chunk_type, content, embedding)
+    SELECT stored_profile_id, chunk.chunk_type, chunk.content, chunk.embedding
+    FROM jsonb_array_elements(COALESCE(item->'chunks', '[]'::JSONB)) AS c,
+         jsonb_populate_record(NULL::linkedin_profiles.profile_chunks, c.value) AS chunk
+    ON CONFLICT (profile_id, chunk_type) DO UPDATE
+    SET content = EXCLUDED.content,
+        embedding = EXCLUDED.embedding;
+
+    RETURN NEXT;
+  END LOOP;
+END;
+$$;
@@ -1,8 +1,17 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
 from app.api.routes import profiles, search
+from app.core.config import settings
+from app.services import index_refresh
+from app.services.sharding import get_search_coordinator, set_search_coordinator
+from app.services.profile_cards import profile_card_store
+from app.services.embedding_models import refresh_embedding_model_state
+from app.services.executors import shutdown_executors
+from app.services.quota import search_quota
 
 app = FastAPI(
     title="LinkedIn Semantic Search API",
@@ -23,6 +32,72 @@ app.add_middleware(
 app.include_router(profiles.router, prefix="/api/v1/profiles", tags=["Profiles"])
 app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
 
+@app.on_event("startup")
+async def load_embedding_model_state():
+    """Prime the embedding model state so requests never read it on the event loop"""
+    state = await refresh_embedding_model_state()
+    print(f"Serving searches with {state.active_model}")
+
+@app.on_event("startup")
+async def load_profile_cards():
+    """Load profile display fields into memory when the card store is enabled"""
+    if not settings.PROFILE_CARD_STORE_ENABLED:
+        return
+    await index_refresh.load_profile_cards()
+    print(f"Loaded {len(profile_card_store)} profile cards ({profile_card_store.memory_bytes() / 1e6:.1f} MB)")
+
+@app.on_event("startup")
+async def start_search_shards():
+    """Partition the profile index across local shard processes when sharding is enabled"""
+    if settings.SEARCH_SHARD_COUNT <= 0:
+        return
+    await index_refresh.start_search_coordinator()
+
+async def _refresh_search_index_periodically():
+    # The frontend signup and delete routes write to Supabase directly, so the
+    # backend's create/delete hooks alone cannot keep cards and shards current
+    while True:
+        await asyncio.sleep(settings.SEARCH_INDEX_REFRESH_SECONDS)
+        try:
+            await index_refresh.refresh_search_index()
+        except Exception as e:
+            print(f"Failed to refresh the in-memory search index: {e}")
+
+_refresh_task = None
+
+@app.on_event("startup")
+async def start_search_index_refresh():
+    global _refresh_task
+    if settings.SEARCH_INDEX_REFRESH_SECONDS > 0 and (
+        settings.PROFILE_CARD_STORE_ENABLED or settings.SEARCH_SHARD_COUNT > 0
+    ):
+        _refresh_task = asyncio.ensure_future(_refresh_search_index_periodically())
+
+@app.on_event("shutdown")
+async def stop_search_index_refresh():
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+
+@app.on_event("shutdown")
+async def stop_search_shards():
+    coordinator = get_search_coordinator()
+    if coordinator:
+        coordinator.close()
+        set_search_coordinator(None)
+
+@app.on_event("startup")
+async def start_quota_flush():
+    search_quota.start()
+
+@app.on_event("shutdown")
+async def flush_search_quota():
+    # Write any buffered search counts before the worker exits
+    await search_quota.stop()
+
+@app.on_event("shutdown")
+async def stop_executors():
+    shutdown_executors()
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint"""
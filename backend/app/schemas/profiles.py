@@ -18,6 +18,12 @@ class Profile(BaseModel):
     created_at: datetime
     updated_at: datetime
 
+class ProfileWrite(BaseModel):
+    """A profile together with its embeddings, written in one call"""
+    profile: Profile
+    # embedding model tag -> vector, e.g. {"text-embedding-ada-002@1536": [...]}
+    embeddings: Dict[str, list]
+
 class ProfileExistsRequest(BaseModel):
     user_id: str
     linkedin_auth: dict
@@ -14,4 +14,29 @@ class SearchResult(BaseModel):
     highlights: Optional[List[str]] = []
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class SearchFilter(BaseModel):
+    field: str
+    value: str
+    operator: str = "ILIKE"
+
+class KeyPhrase(BaseModel):
+    key_phrase: str
+    relevant_section: str
+    corresponding_trait: Optional[str] = None
+    confidence: float = 1.0
+
+class QueryPlan(BaseModel):
+    """Decomposition of an advanced search query, ready for retrieval"""
+    query: str
+    relevant_sections: List[str]
+    filters: List[SearchFilter] = []
+    # Distinct corresponding_trait values of key_phrases; scores average over them
+    traits: List[str] = []
+    key_phrases: List[KeyPhrase] = []
+    embedding_model: str
+    # phrase_embeddings[i] is the embedding of key_phrases[i]
+    phrase_embeddings: List[list] = []
+    # True when a planning prompt failed and a fallback was used instead
+    degraded: bool = False
@@ -0,0 +1,157 @@
+"""
+Background re-embedding job for switching embedding models or dimensions.
+
+    # 1. register the shadow model and backfill its index
+    python -m app.services.embedding_migration backfill text-embedding-3-small@512
+    # 2. compare shadow recall against the active model
+    python -m app.services.embedding_migration compare "ml engineer in nyc" "stanford founders"
+    # 3. switch searches over (atomically), or undo it
+    python -m app.services.embedding_migration cutover --min-recall 0.8 "ml engineer in nyc" "stanford founders"
+    python -m app.services.embedding_migration rollback
+"""
+import argparse
+import asyncio
+import logging
+from typing import Dict, List
+
+from app.services.embedding_models import (
+    cutover_to_shadow_model,
+    refresh_embedding_model_state,
+    rollback_embedding_model,
+    start_shadow_model,
+)
+from app.services.embeddings import generate_embeddings, parse_embedding_model_tag, profile_to_text
+from app.services.executors import run_in_thread
+from app.services.search import embed_query, overlap_at_k
+from app.services.supabase import (
+    count_profiles,
+    fetch_embedded_profile_ids,
+    fetch_profiles_page,
+    semantic_search,
+    store_profile_embedding,
+)
+from app.utils.supabase_client import get_schema_client
+
+logger = logging.getLogger(__name__)
+
+
+async def backfill_shadow_index(model_tag: str, batch_size: int = 100, schema_name="linkedin_profiles") -> int:
+    """
+    Embed every profile that has no model_tag embedding yet and build the model's ANN index
+
+    Safe to re-run: profiles already embedded with model_tag are skipped.
+    Returns the number of profiles embedded.
+    """
+    parse_embedding_model_tag(model_tag)  # fail fast on a malformed tag
+    start_shadow_model(model_tag, schema_name)
+
+    done = await run_in_thread(fetch_embedded_profile_ids, model_tag, schema_name)
+    embedded = 0
+    start = 0
+    while True:
+        page = await run_in_thread(fetch_profiles_page, start, batch_size, schema_name)
+        todo = [profile for profile in page if str(profile.id) not in done]
+        if todo:
+            # One OpenAI request per page
+            vectors = await generate_embeddings([profile_to_text(profile) for profile in todo], model_tag)
+            for profile, vector in zip(todo, vectors):
+                await run_in_thread(store_profile_embedding, profile.id, vector, model_tag, schema_name)
+            embedded += len(todo)
+            logger.info(f"Embedded {embedded} profiles with {model_tag}")
+        if len(page) < batch_size:
+            break
+        start += batch_size
+
+    client = get_schema_client(schema_name)
+    if client:
+        client.rpc("create_embedding_model_index", {"model_tag": model_tag}).execute()
+    return embedded
+
+
+async def compare_recall(queries: List[str], match_count: int = 10) -> Dict[str, float]:
+    """
+    Dual-read each query against the active and shadow models
+
+    Returns overlap@match_count of the shadow results with the active results
+    per query, plus the mean under "mean".
+    """
+    state = await refresh_embedding_model_state()
+    if not state.shadow_model:
+        raise ValueError("No shadow embedding model to compare against")
+
+    report = {}
+    for query in queries:
+        active, shadow = await asyncio.gather(
+            embed_query(query, state.active_model),
+            embed_query(query, state.shadow_model),
+        )
+        active_results, shadow_results = await asyncio.gather(
+            run_in_thread(semantic_search, active, match_count),
+            run_in_thread(semantic_search, shadow, match_count),
+        )
+        report[query] = overlap_at_k(active_results, shadow_results)
+    report["mean"] = sum(report.values()) / len(queries) if queries else 1.0
+    return report
+
+
+async def cutover(queries: List[str] = None, min_recall: float = None, schema_name="linkedin_profiles"):
+    """
+    Make the shadow model active
+
+    Refuses while the shadow index is missing profiles (the backfill has not
+    finished), and optionally when its recall is below min_recall.
+    """
+    state = await refresh_embedding_model_state(schema_name)
+    if not state.shadow_model:
+        raise ValueError("No shadow embedding model to cut over to")
+    embedded, total = await asyncio.gather(
+        run_in_thread(fetch_embedded_profile_ids, state.shadow_model, schema_name),
+        run_in_thread(count_profiles, schema_name),
+    )
+    if len(embedded) < total:
+        raise ValueError(
+            f"{state.shadow_model} covers {len(embedded)} of {total} profiles; "
+            "finish the backfill before cutting over"
+        )
+    if min_recall is not None:
+        if not queries:
+            raise ValueError("Queries are required to check recall before cutting over")
+        report = await compare_recall(queries)
+        if report["mean"] < min_recall:
+            raise ValueError(f"Shadow recall {report['mean']:.2f} is below {min_recall:.2f}; not cutting over")
+    return cutover_to_shadow_model()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate profile embeddings to a new model")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backfill = commands.add_parser("backfill")
+    backfill.add_argument("model_tag", help='e.g. "text-embedding-3-small@512"')
+    backfill.add_argument("--batch-size", type=int, default=100)
+
+    compare = commands.add_parser("compare")
+    compare.add_argument("queries", nargs="+")
+
+    cut = commands.add_parser("cutover")
+    cut.add_argument("queries", nargs="*")
+    cut.add_argument("--min-recall", type=float)
+
+    commands.add_parser("rollback")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        print(f"Embedded {asyncio.run(backfill_shadow_index(args.model_tag, args.batch_size))} profiles")
+    elif args.command == "compare":
+        for query, recall in asyncio.run(compare_recall(args.queries)).items():
+            print(f"{recall:.2f}  {query}")
+    elif args.command == "cutover":
+        state = asyncio.run(cutover(args.queries, args.min_recall))
+        print(f"Active model is now {state.active_model} (rollback target {state.previous_model})")
+    elif args.command == "rollback":
+        state = rollback_embedding_model()
+        print(f"Active model is now {state.active_model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.core.config import settings
+from app.services.executors import run_in_thread
+from app.utils.supabase_client import get_schema_client
+
+logger = logging.getLogger(__name__)
+
+# Seeded by embedding_models.sql; every pre-versioning vector carries this tag
+SEEDED_EMBEDDING_MODEL = "text-embedding-ada-002@1536"
+
+
+class EmbeddingModelState:
+    """
+    Which embedding model serves searches (active), which one is being built
+    alongside it (shadow) and which one a rollback returns to (previous)
+    """
+
+    def __init__(self, active_model: str, shadow_model: Optional[str] = None,
+                 previous_model: Optional[str] = None):
+        self.active_model = active_model
+        self.shadow_model = shadow_model
+        self.previous_model = previous_model
+
+
+_cached_state: Optional[EmbeddingModelState] = None
+_cached_at = 0.0
+# Background refresh started by get_embedding_model_state; kept referenced so it is not collected
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _fetch_state(schema_name: str) -> EmbeddingModelState:
+    client = get_schema_client(schema_name)
+    if client:
+        try:
+            response = client.table("embedding_model_state").select(
+                "active_model, shadow_model, previous_model"
+            ).eq("id", 1).execute()
+            if response.data:
+                row = response.data[0]
+                return EmbeddingModelState(row["active_model"], row.get("shadow_model"),
+                                           row.get("previous_model"))
+        except Exception as e:
+            logger.error(f"Failed to read embedding_model_state: {e}")
+    # Keep serving the last state we saw; before any read succeeds, use the seeded model
+    if _cached_state is not None:
+        logger.warning(f"Using last known embedding model state ({_cached_state.active_model})")
+        return _cached_state
+    logger.warning(f"Using seeded embedding model {SEEDED_EMBEDDING_MODEL}")
+    return EmbeddingModelState(SEEDED_EMBEDDING_MODEL)
+
+
+def _store_state(state: EmbeddingModelState) -> EmbeddingModelState:
+    global _cached_state, _cached_at
+    _cached_state = state
+    _cached_at = time.monotonic()
+    return state
+
+
+async def refresh_embedding_model_state(schema_name="linkedin_profiles") -> EmbeddingModelState:
+    """Re-read the embedding model state on the thread pool and cache it"""
+    return _store_state(await run_in_thread(_fetch_state, schema_name))
+
+
+def get_embedding_model_state(schema_name="linkedin_profiles", refresh: bool = False) -> EmbeddingModelState:
+    """
+    Get the current embedding model state, cached for EMBEDDING_MODEL_STATE_TTL_SECONDS
+
+    On the event loop an expired entry is served as-is while a background
+    task re-reads it, so requests never wait on Supabase; refresh=True and
+    callers outside the loop (CLI jobs) read synchronously.
+
+    Falls back to the last known state, or to the seeded ada-002 model, when
+    the state table is unavailable. The configured EMBEDDING_MODEL is not a
+    safe fallback: no stored vectors may carry its tag.
+    """
+    global _refresh_task
+    expired = _cached_state is None or time.monotonic() - _cached_at > settings.EMBEDDING_MODEL_STATE_TTL_SECONDS
+    if not (refresh or expired):
+        return _cached_state
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return _store_state(_fetch_state(schema_name))
+    if refresh or _cached_state is None:
+        # Nothing to serve meanwhile; startup primes the cache so this is rare
+        logger.warning("Reading embedding_model_state on the event loop")
+        return _store_state(_fetch_state(schema_name))
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.ensure_future(refresh_embedding_model_state(schema_name))
+    return _cached_state
+
+
+def get_active_embedding_model() -> str:
+    return get_embedding_model_state().active_model
+
+
+def get_shadow_embedding_model() -> Optional[str]:
+    return get_embedding_model_state().shadow_model
+
+
+def _call_state_rpc(name: str, params: dict, schema_name: str) -> EmbeddingModelState:
+    client = get_schema_client(schema_name)
+    if not client:
+        raise ValueError("Supabase client not initialized")
+    client.rpc(name, params).execute()
+    return get_embedding_model_state(schema_name, refresh=True)
+
+
+def start_shadow_model(model_tag: str, schema_name="linkedin_profiles") -> EmbeddingModelState:
+    """Mark model_tag as the shadow model; new profiles are embedded with it as well"""
+    return _call_state_rpc("start_shadow_embedding_model", {"model_tag": model_tag}, schema_name)
+
+
+def cutover_to_shadow_model(schema_name="linkedin_profiles") -> EmbeddingModelState:
+    """Atomically make the shadow model active, keeping the old one for rollback"""
+    return _call_state_rpc("cutover_embedding_model", {}, schema_name)
+
+
+def rollback_embedding_model(schema_name="linkedin_profiles") -> EmbeddingModelState:
+    """Atomically swap back to the previously active model"""
+    return _call_state_rpc("rollback_embedding_model", {}, schema_name)
@@ -1,21 +1,39 @@
 import os
+from typing import List, Optional, Tuple
 from openai import AsyncOpenAI
 import dotenv
+from app.core.config import settings
 from app.schemas.profiles import Profile
 
 dotenv.load_dotenv()
 
 client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
-async def generate_embedding(text_or_profile):
+def embedding_model_tag(model: str, dimensions: int) -> str:
     """
-    Generate an embedding for the given text or Profile object using OpenAI
+    Version tag stored with every embedding, e.g. "text-embedding-3-small@512"
+
+    Vectors are only comparable when both the model and the dimension match.
     """
-    # If input is a Profile object, convert it to a string representation
-    if isinstance(text_or_profile, Profile):
-        profile = text_or_profile
-        # Create a string representation of the profile
-        profile_text = f"""
+    return f"{model}@{dimensions}"
+
+def parse_embedding_model_tag(tag: str) -> Tuple[str, int]:
+    """Split an embedding model tag back into (model, dimensions)"""
+    model, _, dimensions = tag.rpartition("@")
+    return model, int(dimensions)
+
+def _embedding_request(tag: str) -> dict:
+    model, dimensions = parse_embedding_model_tag(tag)
+    request = {"model": model}
+    # text-embedding-3 models can return shortened vectors; ada-002 is fixed at 1536
+    if model.startswith("text-embedding-3"):
+        request["dimensions"] = dimensions
+    return request
+
+def profile_to_text(profile: Profile) -> str:
+    """Build the text that is embedded for a profile"""
+    # Create a string representation of the profile
+    profile_text = f"""
         Name: {profile.full_name}
         Headline: {profile.headline or ''}
         Industry: {profile.industry or ''}
@@ -23,43 +41,68 @@ async def generate_embedding(text_or_profile):
         Summary: {profile.summary or ''}
         
         """
-        # Extract additional useful information from raw_profile_data if available
-        if profile.raw_profile_data:
-            # Add experience information
-            if 'experiences' in profile.raw_profile_data:
-                profile_text += "\nExperience:"
-                for exp in profile.raw_profile_data.get('experiences', [])[:5]:  # Limit to 5 most recent
-                    company = exp.get('company', '')
-                    title = exp.get('title', '')
-                    description = exp.get('description', '')
-                    # Add safeguard for None description
-                    desc_snippet = description[:100] + "..." if description else ""
-                    profile_text += f"\n- {title} at {company}: {desc_snippet}"
-            
-            # Add education information
-            if 'education' in profile.raw_profile_data:
-                profile_text += "\nEducation:"
-                for edu in profile.raw_profile_data.get('education', []):
-                    school = edu.get('school', '')
-                    degree = edu.get('degree_name', '')
-                    profile_text += f"\n- {degree} from {school}"
-            
-            # Add skills information
-            if 'skills' in profile.raw_profile_data:
-                profile_text += "\nSkills:"
-                skills = profile.raw_profile_data.get('skills', [])[:10]  # Limit to top 10 skills
-                skill_names = [skill.get('name', '') for skill in skills if skill.get('name')]
-                if skill_names:
-                    profile_text += f"\n- {', '.join(skill_names)}"
+    # Extract additional useful information from raw_profile_data if available
+    if profile.raw_profile_data:
+        # Add experience information
+        if 'experiences' in profile.raw_profile_data:
+            profile_text += "\nExperience:"
+            for exp in profile.raw_profile_data.get('experiences', [])[:5]:  # Limit to 5 most recent
+                company = exp.get('company', '')
+                title = exp.get('title', '')
+                description = exp.get('description', '')
+                # Add safeguard for None description
+                desc_snippet = description[:100] + "..." if description else ""
+                profile_text += f"\n- {title} at {company}: {desc_snippet}"
         
-        input_text = profile_text.strip()
+        # Add education information
+        if 'education' in profile.raw_profile_data:
+            profile_text += "\nEducation:"
+            for edu in profile.raw_profile_data.get('education', []):
+                school = edu.get('school', '')
+                degree = edu.get('degree_name', '')
+                profile_text += f"\n- {degree} from {school}"
         
+        # Add skills information
+        if 'skills' in profile.raw_profile_data:
+            profile_text += "\nSkills:"
+            skills = profile.raw_profile_data.get('skills', [])[:10]  # Limit to top 10 skills
+            skill_names = [skill.get('name', '') for skill in skills if skill.get('name')]
+            if skill_names:
+                profile_text += f"\n- {', '.join(skill_names)}"
+    
+    return profile_text.strip()
+
+async def generate_embedding(text_or_profile, model_tag: Optional[str] = None):
+    """
+    Generate an embedding for the given text or Profile object using OpenAI
+    
+    Args:
+        text_or_profile: Text or Profile to embed
+        model_tag: Embedding model tag (see embedding_model_tag); defaults to the
+            configured EMBEDDING_MODEL and EMBEDDING_DIMENSION
+    """
+    # If input is a Profile object, convert it to a string representation
+    if isinstance(text_or_profile, Profile):
+        input_text = profile_to_text(text_or_profile)
     else:
         input_text = text_or_profile
     
     response = await client.embeddings.create(
-        model="text-embedding-ada-002",
-        input=input_text
+        input=input_text,
+        **_embedding_request(model_tag or default_embedding_model_tag())
     )
     
     return response.data[0].embedding
+
+async def generate_embeddings(texts: List[str], model_tag: Optional[str] = None) -> List[List[float]]:
+    """Embed many texts in a single OpenAI request, preserving order"""
+    if not texts:
+        return []
+    response = await client.embeddings.create(
+        input=texts,
+        **_embedding_request(model_tag or default_embedding_model_tag())
+    )
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+def default_embedding_model_tag() -> str:
+    return embedding_model_tag(settings.EMBEDDING_MODEL, settings.EMBEDDING_DIMENSION)
@@ -0,0 +1,73 @@
+import asyncio
+import functools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from app.core.config import settings
+
+_thread_pool: Optional[ThreadPoolExecutor] = None
+_process_pool: Optional[ProcessPoolExecutor] = None
+_heavy_slots: Optional[asyncio.Semaphore] = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Thread pool for work that releases the GIL (C extensions, hashing, blocking I/O)"""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(
+            max_workers=settings.EXECUTOR_THREAD_WORKERS or None,
+            thread_name_prefix="search-cpu",
+        )
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Process pool for pure-Python work (model hydration, JSON parsing, scoring loops)"""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=settings.EXECUTOR_PROCESS_WORKERS or None)
+    return _process_pool
+
+
+def _get_heavy_slots() -> asyncio.Semaphore:
+    # Caps how many heavy jobs are in flight so one burst of large searches
+    # queues up here instead of monopolising every worker
+    global _heavy_slots
+    if _heavy_slots is None:
+        _heavy_slots = asyncio.Semaphore(settings.EXECUTOR_MAX_HEAVY_TASKS)
+    return _heavy_slots
+
+
+async def run_in_thread(fn, *args, **kwargs):
+    """Run fn on the thread pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_thread_pool(), functools.partial(fn, *args, **kwargs))
+
+
+async def run_in_process(fn, *args, **kwargs):
+    """Run a picklable, module-level fn on the process pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    async with _get_heavy_slots():
+        return await loop.run_in_executor(get_process_pool(), functools.partial(fn, *args, **kwargs))
+
+
+async def map_in_process(fn, items: Sequence, chunk_size: int) -> List:
+    """
+    Split items into chunks, run fn(chunk) for each chunk on the process pool
+    and concatenate the results in order
+    """
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    results = await asyncio.gather(*(run_in_process(fn, chunk) for chunk in chunks))
+    return [item for chunk_result in results for item in chunk_result]
+
+
+def shutdown_executors():
+    global _thread_pool, _process_pool, _heavy_slots
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+    _heavy_slots = None
+
@@ -0,0 +1,175 @@
+"""
+Keep the in-memory profile card store and search shards in step with Supabase.
+
+Both are loaded in full at startup. After that, each sync fetches only the
+profiles updated since the newest updated_at already applied, plus the list
+of profile ids to find deletions, and patches the running shard processes
+in place. The shards are only rebuilt when the active embedding model
+changes, and the new ones are synced before they are swapped in so writes
+made during the rebuild are not lost.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.embedding_models import get_active_embedding_model
+from app.services.executors import run_in_thread
+from app.services.profile_cards import ProfileCardStore, profile_card_store
+from app.services.sharding import (
+    ShardedSearchCoordinator,
+    build_local_coordinator,
+    get_search_coordinator,
+    set_search_coordinator,
+    shard_row,
+)
+from app.services.supabase import fetch_profile_cards, fetch_profile_ids, fetch_profiles_with_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Newest profiles.updated_at applied to each index
+_cards_synced_through: Optional[datetime] = None
+_shards_synced_through: Optional[datetime] = None
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return None
+
+
+def newest_update(rows: List[Dict[str, Any]], since: Optional[datetime] = None) -> Optional[datetime]:
+    """The newest updated_at among rows, or since when none is newer"""
+    stamps = [stamp for stamp in (_parse_timestamp(row.get("updated_at")) for row in rows) if stamp]
+    if since is not None:
+        stamps.append(since)
+    return max(stamps, default=None)
+
+
+def _updated_since(synced_through: Optional[datetime]) -> Optional[str]:
+    if synced_through is None:
+        return None
+    return (synced_through - timedelta(seconds=settings.SEARCH_INDEX_REFRESH_OVERLAP_SECONDS)).isoformat()
+
+
+def _load_card_store() -> Tuple[ProfileCardStore, Optional[datetime]]:
+    store = ProfileCardStore()
+    rows = fetch_profile_cards()
+    store.load(rows)
+    return store, newest_update(rows)
+
+
+async def load_profile_cards() -> None:
+    """Load every profile card, replacing the store's contents"""
+    global _cards_synced_through
+    store, _cards_synced_through = await run_in_thread(_load_card_store)
+    profile_card_store.replace_with(store)
+
+
+async def sync_profile_cards(profile_ids: Set[str], card_ids: List[str]) -> int:
+    """
+    Apply profiles updated since the last sync and drop deleted ones
+
+    card_ids must be read from the store before profile_ids is fetched, so a
+    card added in between is not mistaken for a deleted profile.
+    Returns the number of cards changed.
+    """
+    global _cards_synced_through
+    rows = await run_in_thread(fetch_profile_cards, updated_since=_updated_since(_cards_synced_through))
+    for row in rows:
+        profile_card_store.upsert(row)
+    deleted = [profile_id for profile_id in card_ids if profile_id not in profile_ids]
+    for profile_id in deleted:
+        profile_card_store.remove_profile(profile_id)
+    _cards_synced_through = newest_update(rows, _cards_synced_through)
+    return len(rows) + len(deleted)
+
+
+async def build_search_coordinator() -> Tuple[ShardedSearchCoordinator, Optional[datetime]]:
+    """
+    Partition every profile embedded with the active model across new shard processes
+
+    Returns the coordinator and the newest updated_at it holds.
+    """
+    embedding_model = get_active_embedding_model()
+    rows = await run_in_thread(fetch_profiles_with_embeddings, embedding_model)
+    coordinator = build_local_coordinator(
+        [shard_row(row, row["embedding"], settings.PROFILE_CARD_STORE_ENABLED) for row in rows],
+        settings.SEARCH_SHARD_COUNT,
+        replicas=settings.SEARCH_SHARD_REPLICAS,
+        shard_timeout=settings.SEARCH_SHARD_TIMEOUT_SECONDS,
+        hedge_after=settings.SEARCH_SHARD_HEDGE_AFTER_SECONDS,
+        embedding_model=embedding_model,
+    )
+    try:
+        served = await coordinator.warm_up()
+    except BaseException:
+        coordinator.close()
+        raise
+    logger.info(f"Started {settings.SEARCH_SHARD_COUNT} search shards serving {served} profiles")
+    return coordinator, newest_update(rows)
+
+
+async def start_search_coordinator() -> None:
+    global _shards_synced_through
+    coordinator, _shards_synced_through = await build_search_coordinator()
+    set_search_coordinator(coordinator)
+
+
+async def sync_search_coordinator(coordinator: ShardedSearchCoordinator, profile_ids: Set[str],
+                                  shard_ids: Set[str], synced_through: Optional[datetime]) -> Optional[datetime]:
+    """
+    Apply profiles updated since synced_through to the shards and drop deleted ones
+
+    shard_ids must be read from the shards before profile_ids is fetched (see
+    sync_profile_cards). Returns the newest updated_at the shards now hold.
+    """
+    rows = await run_in_thread(
+        fetch_profiles_with_embeddings, coordinator.embedding_model,
+        updated_since=_updated_since(synced_through),
+    )
+    await coordinator.upsert_profiles(
+        [shard_row(row, row["embedding"], settings.PROFILE_CARD_STORE_ENABLED) for row in rows]
+    )
+    await coordinator.remove_profiles(shard_ids - profile_ids)
+    return newest_update(rows, synced_through)
+
+
+async def refresh_search_index() -> None:
+    """Bring the card store and shards up to date with writes made outside the backend"""
+    global _shards_synced_through
+    coordinator = get_search_coordinator() if settings.SEARCH_SHARD_COUNT > 0 else None
+    synced_through = _shards_synced_through
+    rebuilt = False
+    if coordinator is not None and coordinator.embedding_model != get_active_embedding_model():
+        # Vectors from the old model are useless to the new one; start over.
+        # The old shards keep serving (Supabase answers for the new model) meanwhile.
+        coordinator, synced_through = await build_search_coordinator()
+        rebuilt = True
+
+    try:
+        # Snapshot what the indexes hold before listing the profiles that still exist
+        card_ids = profile_card_store.profile_ids() if settings.PROFILE_CARD_STORE_ENABLED else []
+        shard_ids = await coordinator.profile_ids() if coordinator is not None else set()
+        profile_ids = await run_in_thread(fetch_profile_ids)
+
+        if settings.PROFILE_CARD_STORE_ENABLED:
+            await sync_profile_cards(profile_ids, card_ids)
+        if coordinator is not None:
+            # Also picks up writes the old shards took while new ones were being built
+            synced_through = await sync_search_coordinator(coordinator, profile_ids, shard_ids, synced_through)
+    except BaseException:
+        if rebuilt:
+            coordinator.close()
+        raise
+
+    _shards_synced_through = synced_through
+    if rebuilt:
+        previous = get_search_coordinator()
+        set_search_coordinator(coordinator)
+        if previous is not None:
+            # Searches already running on the old shards get up to the shard timeout to finish
+            asyncio.get_running_loop().call_later(settings.SEARCH_SHARD_TIMEOUT_SECONDS, previous.close)
@@ -0,0 +1,246 @@
+import sys
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.schemas.profiles import Profile
+from app.schemas.search import SearchResult
+
+CARD_FIELDS = (
+    "full_name",
+    "headline",
+    "industry",
+    "location",
+    "profile_picture_url",
+    "profile_url",
+)
+
+
+class StringPool:
+    """
+    Interned strings addressed by integer code
+
+    Code 0 is reserved for None, so columns can store a missing value without
+    a separate null mask.
+    """
+
+    def __init__(self):
+        self._strings: List[Optional[str]] = [None]
+        self._codes: Dict[str, int] = {}
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self._strings)
+            value = sys.intern(value)
+            self._strings.append(value)
+            self._codes[value] = code
+        return code
+
+    def value(self, code: int) -> Optional[str]:
+        return self._strings[code]
+
+    def __len__(self):
+        return len(self._strings) - 1
+
+
+def _uuid_bytes(value) -> bytes:
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    try:
+        # Much cheaper than uuid.UUID() for the canonical 36-character form
+        return bytes.fromhex(value.replace("-", ""))
+    except (AttributeError, ValueError):
+        return uuid.UUID(str(value)).bytes
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    return 0.0
+
+
+class ProfileCardStore:
+    """
+    Display fields for every profile, held in columnar arrays
+
+    Each profile gets a dense integer id. Ids, user ids and timestamps are
+    packed into flat byte and float arrays. Text fields are stored as codes
+    into a shared StringPool, so repeated headlines, industries and locations
+    are stored once. There is no per-profile dict or object. Search hits are
+    turned into cards with array lookups, so no database fetch is needed.
+
+    Cards carry no raw_profile_data or summary, only what a result card shows.
+    The most recently hydrated profiles are kept as validated Profile models
+    (up to profile_cache_size), so popular profiles skip validation. Results
+    share these instances; treat them as read-only.
+    Writes that bypass the backend (the frontend signup and delete routes)
+    only show up after the next periodic sync (SEARCH_INDEX_REFRESH_SECONDS).
+    """
+
+    def __init__(self, profile_cache_size: int = 4096):
+        self._pool = StringPool()
+        self._columns: Dict[str, array] = {field: array("I") for field in CARD_FIELDS}
+        self._profile_ids = bytearray()  # 16 bytes per dense id
+        self._user_ids = bytearray()
+        self._created_at = array("d")
+        self._updated_at = array("d")
+        self._alive = bytearray()
+        self._free: List[int] = []
+        self._dense_ids: Dict[bytes, int] = {}
+        self._by_user: Dict[bytes, int] = {}
+        self._profiles: "OrderedDict[int, Profile]" = OrderedDict()
+        self._profile_cache_size = profile_cache_size
+
+    def __len__(self):
+        return len(self._dense_ids)
+
+    def upsert(self, row: Dict[str, Any]) -> int:
+        """
+        Add or replace a profile's card from a profile row or Profile.model_dump()
+
+        Returns the profile's dense id, which stays stable across updates.
+        """
+        profile_key = _uuid_bytes(row["id"])
+        user_key = _uuid_bytes(row["user_id"])
+
+        # A user has one profile; a new profile id for the same user replaces the old card
+        previous = self._by_user.get(user_key)
+        if previous is not None and self._profile_ids[previous * 16:(previous + 1) * 16] != profile_key:
+            self._remove_dense(previous)
+
+        dense_id = self._dense_ids.get(profile_key)
+        if dense_id is None:
+            dense_id = self._allocate()
+            self._dense_ids[profile_key] = dense_id
+        self._profiles.pop(dense_id, None)
+
+        self._profile_ids[dense_id * 16:(dense_id + 1) * 16] = profile_key
+        self._user_ids[dense_id * 16:(dense_id + 1) * 16] = user_key
+        for field in CARD_FIELDS:
+            self._columns[field][dense_id] = self._pool.code(row.get(field))
+        self._created_at[dense_id] = _timestamp(row.get("created_at"))
+        self._updated_at[dense_id] = _timestamp(row.get("updated_at"))
+        self._alive[dense_id] = 1
+        self._by_user[user_key] = dense_id
+        return dense_id
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        for row in rows:
+            self.upsert(row)
+            count += 1
+        return count
+
+    def replace_with(self, other: "ProfileCardStore") -> None:
+        """Swap in the contents of a freshly loaded store, e.g. one built on a worker thread"""
+        self.__dict__.update(other.__dict__)
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        dense_id = len(self._alive)
+        for column in self._columns.values():
+            column.append(0)
+        self._profile_ids.extend(bytes(16))
+        self._user_ids.extend(bytes(16))
+        self._created_at.append(0.0)
+        self._updated_at.append(0.0)
+        self._alive.append(0)
+        return dense_id
+
+    def _remove_dense(self, dense_id: int):
+        profile_key = bytes(self._profile_ids[dense_id * 16:(dense_id + 1) * 16])
+        user_key = bytes(self._user_ids[dense_id * 16:(dense_id + 1) * 16])
+        self._dense_ids.pop(profile_key, None)
+        if self._by_user.get(user_key) == dense_id:
+            del self._by_user[user_key]
+        self._alive[dense_id] = 0
+        self._free.append(dense_id)
+        self._profiles.pop(dense_id, None)
+
+    def remove_user(self, user_id) -> bool:
+        dense_id = self._by_user.get(_uuid_bytes(user_id))
+        if dense_id is None:
+            return False
+        self._remove_dense(dense_id)
+        return True
+
+    def remove_profile(self, profile_id) -> bool:
+        dense_id = self._dense_ids.get(_uuid_bytes(profile_id))
+        if dense_id is None:
+            return False
+        self._remove_dense(dense_id)
+        return True
+
+    def profile_ids(self) -> List[str]:
+        return [str(uuid.UUID(bytes=key)) for key in self._dense_ids]
+
+    def dense_id(self, profile_id) -> Optional[int]:
+        return self._dense_ids.get(_uuid_bytes(profile_id))
+
+    def contains_all(self, profile_ids: Iterable) -> bool:
+        return all(self.dense_id(profile_id) is not None for profile_id in profile_ids)
+
+    def _card(self, dense_id: int) -> Dict[str, Any]:
+        pool_value = self._pool.value
+        columns = self._columns
+        card = {field: pool_value(columns[field][dense_id]) for field in CARD_FIELDS}
+        # Converted here: pydantic's bytes -> UUID and float -> datetime parsing is slower
+        card["id"] = uuid.UUID(bytes=bytes(self._profile_ids[dense_id * 16:(dense_id + 1) * 16]))
+        card["user_id"] = uuid.UUID(bytes=bytes(self._user_ids[dense_id * 16:(dense_id + 1) * 16]))
+        card["created_at"] = datetime.fromtimestamp(self._created_at[dense_id], timezone.utc)
+        card["updated_at"] = datetime.fromtimestamp(self._updated_at[dense_id], timezone.utc)
+        card["raw_profile_data"] = {}
+        return card
+
+    def profile(self, dense_id: int) -> Profile:
+        profile = self._profiles.get(dense_id)
+        if profile is not None:
+            self._profiles.move_to_end(dense_id)
+            return profile
+        # model_construct() measured slower than validating the pre-converted card
+        profile = Profile.model_validate(self._card(dense_id))
+        if self._profile_cache_size:
+            self._profiles[dense_id] = profile
+            if len(self._profiles) > self._profile_cache_size:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def hydrate_dense(self, hits: Iterable[Tuple[int, float]]) -> List[SearchResult]:
+        """Turn (dense id, score) hits into SearchResults"""
+        return [SearchResult(profile=self.profile(dense_id), score=score) for dense_id, score in hits]
+
+    def hydrate(self, hits: Iterable[Tuple[Any, float]]) -> List[SearchResult]:
+        """Turn (profile id, score) hits into SearchResults; unknown ids are skipped"""
+        dense_ids = self._dense_ids
+        dense_hits = []
+        for profile_id, score in hits:
+            dense_id = dense_ids.get(_uuid_bytes(profile_id))
+            if dense_id is not None:
+                dense_hits.append((dense_id, score))
+        return self.hydrate_dense(dense_hits)
+
+    def memory_bytes(self) -> int:
+        """
+        Approximate memory held by the store, including the interned strings
+        and index dicts but not the cached Profile models
+        """
+        total = sum(sys.getsizeof(column) for column in self._columns.values())
+        total += sys.getsizeof(self._profile_ids) + sys.getsizeof(self._user_ids)
+        total += sys.getsizeof(self._created_at) + sys.getsizeof(self._updated_at) + sys.getsizeof(self._alive)
+        total += sys.getsizeof(self._pool._strings) + sys.getsizeof(self._pool._codes)
+        total += sum(sys.getsizeof(code) for code in self._pool._codes.values())
+        total += sum(sys.getsizeof(value) for value in self._pool._strings if value is not None)
+        for index in (self._dense_ids, self._by_user):
+            total += sys.getsizeof(index) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in index.items())
+        return total
+
+
+profile_card_store = ProfileCardStore()
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import logging
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.schemas.search import KeyPhrase, QueryPlan, SearchFilter
+from app.services.embedding_models import get_active_embedding_model
+from app.services.embeddings import client as openai_client
+from app.services.embeddings import generate_embeddings
+from app.services.query_prompts import (
+    FILTERS_PROMPT,
+    KEY_PHRASES_PROMPT,
+    RELEVANT_SECTIONS_PROMPT,
+    SEARCH_SECTIONS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LLMClient(ABC):
+    """Minimal interface the planner needs: a system + user prompt in, a JSON object out"""
+
+    @abstractmethod
+    async def complete_json(self, system: str, user: str, temperature: float = 0.2) -> Dict[str, Any]:
+        ...
+
+
+class OpenAIChatLLM(LLMClient):
+    def __init__(self, model: str):
+        self.model = model
+
+    async def complete_json(self, system: str, user: str, temperature: float = 0.2) -> Dict[str, Any]:
+        response = await openai_client.chat.completions.create(
+            model=self.model,
+            response_format={"type": "json_object"},
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": user},
+            ],
+            temperature=temperature,
+        )
+        content = response.choices[0].message.content
+        if not content:
+            raise ValueError("No content in response")
+        return json.loads(content)
+
+
+class FakeLLM(LLMClient):
+    """
+    Offline stand-in for tests and benchmarks
+
+    Each prompt is answered by the first responder whose key appears in the
+    system prompt; responders receive the user message and return a dict.
+    delay simulates model latency, every call is recorded in calls and
+    max_in_flight is the most calls that were ever awaiting at once.
+    """
+
+    def __init__(self, responders: Optional[Dict[str, Callable[[str], Dict[str, Any]]]] = None,
+                 delay: float = 0.0):
+        self.responders = responders if responders is not None else default_fake_responders()
+        self.delay = delay
+        self.calls: List[Tuple[str, str]] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def complete_json(self, system: str, user: str, temperature: float = 0.2) -> Dict[str, Any]:
+        self.calls.append((system, user))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        for key, responder in self.responders.items():
+            if key in system:
+                return responder(user)
+        return {}
+
+
+def default_fake_responders() -> Dict[str, Callable[[str], Dict[str, Any]]]:
+    """Deterministic answers derived from the quoted query, keyed by a phrase unique to each prompt"""
+
+    def quoted(user: str) -> str:
+        match = re.search(r'"(.*)"', user)
+        return match.group(1) if match else user
+
+    return {
+        "relevant_sections": lambda user: {"relevant_sections": ["basic_info", "experiences"]},
+        "Extract exact filters": lambda user: {"filters": []},
+        "generate key phrases": lambda user: {"key_phrases": [{
+            "key_phrase": quoted(user),
+            "corresponding_trait": quoted(user),
+            "relevant_section": "experiences",
+            "confidence": 1.0,
+        }]},
+    }
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: case, surrounding punctuation and repeated whitespace don't matter"""
+    return re.sub(r"\s+", " ", query).strip().strip("?!.,;:").strip().lower()
+
+
+class QueryPlanCache:
+    """LRU cache of query plans with a time-to-live"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._plans: "OrderedDict[Tuple[str, str], Tuple[float, QueryPlan]]" = OrderedDict()
+
+    def get(self, key: Tuple[str, str]) -> Optional[QueryPlan]:
+        entry = self._plans.get(key)
+        if entry is None:
+            return None
+        stored_at, plan = entry
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del self._plans[key]
+            return None
+        self._plans.move_to_end(key)
+        return plan
+
+    def put(self, key: Tuple[str, str], plan: QueryPlan) -> None:
+        self._plans[key] = (time.monotonic(), plan)
+        self._plans.move_to_end(key)
+        while len(self._plans) > self.max_size:
+            self._plans.popitem(last=False)
+
+    def clear(self):
+        self._plans.clear()
+
+
+class QueryPlanner:
+    """
+    Turn an advanced search query into a QueryPlan
+
+    The section, filter and key-phrase prompts only depend on the query, so
+    they run concurrently and planning takes about as long as the
+    slowest prompt. All key phrases are then embedded in one request. Plans
+    are cached by normalized query and embedding model, and concurrent
+    requests for the same query share one planning run. Plans where a
+    prompt failed and a fallback was used are marked degraded and not cached.
+    """
+
+    def __init__(self, llm: LLMClient, cache: QueryPlanCache):
+        self.llm = llm
+        self.cache = cache
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    async def _relevant_sections(self, query: str) -> List[str]:
+        response = await self.llm.complete_json(
+            f"{RELEVANT_SECTIONS_PROMPT}\n\nAvailable sections: {json.dumps(SEARCH_SECTIONS)}",
+            f'Analyze this search query: "{query}"',
+        )
+        sections = [section for section in response.get("relevant_sections", []) if section in SEARCH_SECTIONS]
+        # No usable sections: search all of them
+        return sections or list(SEARCH_SECTIONS)
+
+    async def _filters(self, query: str) -> List[SearchFilter]:
+        response = await self.llm.complete_json(FILTERS_PROMPT, f'Extract filters from this search query: "{query}"')
+        return [SearchFilter(**item) for item in response.get("filters", [])]
+
+    async def _key_phrases(self, query: str) -> List[KeyPhrase]:
+        response = await self.llm.complete_json(
+            f"{KEY_PHRASES_PROMPT}\n\nAvailable sections: {json.dumps(SEARCH_SECTIONS)}",
+            f'Generate key phrases for this search query: "{query}"',
+            temperature=0.5,
+        )
+        return [
+            KeyPhrase(**item) for item in response.get("key_phrases", [])
+            if item.get("key_phrase") and item.get("relevant_section") in SEARCH_SECTIONS
+        ]
+
+    async def _build_plan(self, query: str, embedding_model: str) -> QueryPlan:
+        outcomes = await asyncio.gather(
+            self._relevant_sections(query),
+            self._filters(query),
+            self._key_phrases(query),
+            return_exceptions=True,
+        )
+
+        # A failed prompt degrades the plan rather than failing the search
+        names = ("relevant sections", "filters", "key phrases")
+        fallbacks = (list(SEARCH_SECTIONS), [], [])
+        degraded = False
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Error getting {name}: {outcome}")
+                degraded = True
+        relevant_sections, filters, key_phrases = [
+            fallback if isinstance(outcome, Exception) else outcome
+            for outcome, fallback in zip(outcomes, fallbacks)
+        ]
+
+        # Key phrases were generated against every section; keep the ones for
+        # the sections judged relevant unless that would leave nothing
+        in_section = [phrase for phrase in key_phrases if phrase.relevant_section in relevant_sections]
+        key_phrases = in_section or key_phrases
+        if not key_phrases:
+            # Always search for something: fall back to the raw query
+            key_phrases = [KeyPhrase(key_phrase=query, relevant_section="basic_info", corresponding_trait=query)]
+        # The key-phrase prompt names the trait behind each phrase; search_with_plan scores per trait
+        traits = list(dict.fromkeys(phrase.corresponding_trait or phrase.key_phrase for phrase in key_phrases))
+
+        phrase_embeddings = await generate_embeddings([phrase.key_phrase for phrase in key_phrases], embedding_model)
+
+        return QueryPlan(
+            query=query,
+            relevant_sections=relevant_sections,
+            filters=filters,
+            traits=traits,
+            key_phrases=key_phrases,
+            embedding_model=embedding_model,
+            phrase_embeddings=phrase_embeddings,
+            degraded=degraded,
+        )
+
+    async def plan(self, query: str, embedding_model: Optional[str] = None) -> QueryPlan:
+        embedding_model = embedding_model or get_active_embedding_model()
+        # The model is part of the key so a cutover never serves stale vectors
+        key = (normalize_query(query), embedding_model)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._build_plan(query, embedding_model))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        # Shielded so one caller going away does not cancel the plan for the others
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Tuple[str, str], future: asyncio.Future):
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        plan = future.result()
+        # A plan built from fallbacks is only good until the LLM recovers
+        if not plan.degraded:
+            self.cache.put(key, plan)
+
+
+query_planner = QueryPlanner(
+    OpenAIChatLLM(settings.QUERY_PLANNER_MODEL),
+    QueryPlanCache(settings.QUERY_PLAN_CACHE_SIZE, settings.QUERY_PLAN_CACHE_TTL_SECONDS),
+)
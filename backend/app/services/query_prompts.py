@@ -0,0 +1,104 @@
+# System prompts for the advanced search query-planning stage.
+# Kept in step with the prompts in frontend/src/app/api/search.
+
+SEARCH_SECTIONS = [
+    "basic_info",
+    "education",
+    "experiences",
+    "achievements",
+    "projects",
+    "location",
+]
+
+RELEVANT_SECTIONS_PROMPT = """You are a search query analyzer. Analyze the search query and return a JSON object with:
+- relevant_sections: Array of relevant section names from the provided list
+- confidence: Number between 0-1 indicating confidence in the selection
+- reasoning: Brief explanation of why these sections were chosen"""
+
+FILTERS_PROMPT = """You are a search query analyzer. Extract exact filters from the search query that would help identify LinkedIn profiles.
+
+Return a JSON object with:
+- filters: Array of filter objects, each containing:
+  * field: The JSONB path in raw_profile_data (e.g., 'full_name', 'education.school', 'experiences.company')
+  * value: The exact value to match
+  * operator: The operator to use ('=' for exact match, 'ILIKE' for text search, '@>' for array containment)
+- reasoning: Brief explanation of why these filters were chosen
+
+Focus on extracting:
+- Exact company names
+- Exact school names
+- Exact locations (city, state, country)
+- Exact job titles
+- Exact skill names
+
+Example response:
+{
+  "filters": [
+    {
+      "field": "experiences.company",
+      "value": "Google",
+      "operator": "="
+    },
+    {
+      "field": "education.school",
+      "value": "Columbia University",
+      "operator": "="
+    }
+  ],
+  "reasoning": "Extracted exact company and school names for precise matching"
+}"""
+
+# Unlike the frontend prompt this works from the query itself, identifying the
+# traits inline; the plan's traits are the corresponding_trait values it returns
+KEY_PHRASES_PROMPT = """You are a search query analyzer. Identify the distinct traits a matching profile must have, then for each trait generate key phrases that relevant profiles might have in their sections.
+
+Can be somewhat creative with it. 
+
+Return a JSON object with:
+- key_phrases: Array of objects, each containing:
+  * key_phrase: The searchable phrase
+  * corresponding_trait: The trait this phrase was generated for
+  * relevant_section: Which section this phrase applies to
+  * confidence: Number between 0-1 indicating confidence in this mapping
+- reasoning: Brief explanation of why these key phrases were chosen
+
+General Rules:
+- Use key phrases to broaden search rather than restrict it
+- Never generate extremely strict key phrases (i.e ones that hard-code month and year)
+- Include common abbreviations (e.g., "SWE" for "Software Engineer", "PM" for "Product Manager")
+- Consider company name variations (e.g., "Meta" and "Facebook")
+- Include both full and abbreviated university names (e.g., "UC Berkeley" and "Berkeley")
+- Account for international variations (e.g., "Software Developer" and "Software Engineer")
+- Consider industry-specific synonyms (e.g., "Growth" and "Marketing")
+- Include both hyphenated and non-hyphenated versions if common (e.g., "co-founder" and "cofounder")
+
+For example:
+
+Input: Columbia VC tech investors
+
+Output:
+{
+  "key_phrases": [
+    {
+      "key_phrase": "Columbia University Alumnus",
+      "corresponding_trait": "Graduated from Columbia University",
+      "relevant_section": "education",
+      "confidence": 0.9
+    },
+    {
+      "key_phrase": "Venture Capital Professional",
+      "corresponding_trait": "is in venture capital now",
+      "relevant_section": "experiences",
+      "confidence": 0.8
+    },
+    {
+      "key_phrase": "Focused on tech startups",
+      "corresponding_trait": "is investing in tech",
+      "relevant_section": "experiences",
+      "confidence": 0.9
+    }
+  ],
+  "reasoning": "Columbia University is a prestigious institution, and VC is a common role for alumni."
+}
+
+Focus on generating phrases that would be commonly found in LinkedIn profiles."""
@@ -0,0 +1,309 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.executors import run_in_thread
+from app.utils.supabase_client import get_schema_client
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceededError(Exception):
+    """Raised when a user is out of monthly searches or is searching too fast"""
+
+    def __init__(self, message: str, monthly: bool):
+        super().__init__(message)
+        self.monthly = monthly
+
+
+class OverloadedError(Exception):
+    """Raised when a request is shed because the admission queue is full"""
+
+
+class TokenBucket:
+    """Classic token bucket: refills at rate tokens/second up to capacity"""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, tokens: float = 1.0) -> bool:
+        self._refill()
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def fill_ratio(self) -> float:
+        self._refill()
+        return self.tokens / self.capacity
+
+
+class _MonthlyUsage:
+    __slots__ = ("searches_this_month", "monthly_search_limit", "loaded_at")
+
+    def __init__(self, searches_this_month: int, monthly_search_limit: int):
+        self.searches_this_month = searches_this_month
+        self.monthly_search_limit = monthly_search_limit
+        self.loaded_at = time.monotonic()
+
+
+class SearchQuotaManager:
+    """
+    In-memory search quota enforcement with write-behind to usage_tracking.search_limits
+
+    A user's row is read once and then checked from memory. Admitted
+    searches bump an in-memory counter and are written back in batches by a
+    periodic flush, so the database sees one call per flush interval rather
+    than one per search.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, default_monthly_limit: int,
+                 flush_interval: float, refresh_interval: float, schema_name="usage_tracking"):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = burst
+        self.default_monthly_limit = default_monthly_limit
+        self.flush_interval = flush_interval
+        self.refresh_interval = refresh_interval
+        self.schema_name = schema_name
+
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._usage: Dict[str, _MonthlyUsage] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, int] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def _fetch_usage(self, user_id: str) -> _MonthlyUsage:
+        client = get_schema_client(self.schema_name)
+        if not client:
+            return _MonthlyUsage(0, self.default_monthly_limit)
+
+        response = client.table("search_limits").select(
+            "searches_this_month, monthly_search_limit"
+        ).eq("user_id", user_id).execute()
+
+        if not response.data:
+            return _MonthlyUsage(0, self.default_monthly_limit)
+        row = response.data[0]
+        return _MonthlyUsage(row["searches_this_month"], row["monthly_search_limit"])
+
+    async def _load_usage(self, user_id: str) -> _MonthlyUsage:
+        usage = await run_in_thread(self._fetch_usage, user_id)
+        # Increments recorded locally but not yet flushed are not in the row yet
+        usage.searches_this_month += self._pending.get(user_id, 0)
+        self._usage[user_id] = usage
+        return usage
+
+    async def _get_usage(self, user_id: str) -> _MonthlyUsage:
+        usage = self._usage.get(user_id)
+        if usage is not None and time.monotonic() - usage.loaded_at < self.refresh_interval:
+            return usage
+
+        # Coalesce concurrent first requests from the same user into one read
+        task = self._loading.get(user_id)
+        if task is None:
+            task = asyncio.ensure_future(self._load_usage(user_id))
+            self._loading[user_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(user_id, None))
+
+        if usage is not None:
+            # Serve the stale copy while the refresh happens in the background
+            return usage
+        return await task
+
+    async def check(self, user_id: str) -> None:
+        """
+        Reserve one search for user_id or raise QuotaExceededError
+
+        The search is counted straight away, so concurrent requests cannot all
+        pass the limit check; call refund() if the search then fails. Only
+        the first search from a user (and periodic refreshes) touches the database.
+        """
+        usage = await self._get_usage(user_id)
+        # No await between the check and the increment, so this is atomic on the event loop
+        if usage.searches_this_month >= usage.monthly_search_limit:
+            raise QuotaExceededError("Search limit reached", monthly=True)
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.rate_per_second, self.burst)
+        if not bucket.take():
+            raise QuotaExceededError("Too many searches, please slow down", monthly=False)
+
+        self._add(user_id, usage, 1)
+
+    def refund(self, user_id: str) -> None:
+        """Undo the reservation made by check() for a search that failed"""
+        self._add(user_id, self._usage.get(user_id), -1)
+
+    def _add(self, user_id: str, usage: Optional[_MonthlyUsage], count: int) -> None:
+        # Written to the database on the next flush
+        if usage is not None:
+            usage.searches_this_month += count
+        self._pending[user_id] = self._pending.get(user_id, 0) + count
+
+    def priority(self, user_id: str) -> int:
+        """
+        Admission priority for a search, lower is served first
+
+        Users burning through their burst allowance rank behind users
+        searching at a normal pace.
+        """
+        bucket = self._buckets.get(user_id)
+        if bucket is not None and bucket.fill_ratio() < 0.5:
+            return 1
+        return 0
+
+    def _write_increments(self, increments: Dict[str, int]) -> None:
+        client = get_schema_client(self.schema_name)
+        if not client:
+            return
+        user_ids = list(increments)
+        client.rpc("increment_user_search_counts", {
+            "user_ids_param": user_ids,
+            "increments_param": [increments[user_id] for user_id in user_ids],
+        }).execute()
+
+    async def flush(self) -> None:
+        """Write all pending increments to search_limits in a single RPC"""
+        if not self._pending:
+            return
+        increments, self._pending = self._pending, {}
+        # A search reserved and refunded within one interval nets out to nothing
+        increments = {user_id: count for user_id, count in increments.items() if count}
+        if not increments:
+            return
+        try:
+            await run_in_thread(self._write_increments, increments)
+        except Exception as e:
+            logger.error(f"Failed to flush search counts for {len(increments)} users: {e}")
+            # Put them back so the next flush retries
+            for user_id, count in increments.items():
+                self._pending[user_id] = self._pending.get(user_id, 0) + count
+
+    def evict_idle(self) -> int:
+        """
+        Forget users with nothing left to lose: a usage row due for a re-read,
+        a full token bucket and no unflushed searches
+
+        Returns the number of users evicted.
+        """
+        now = time.monotonic()
+        idle = [
+            user_id for user_id, usage in self._usage.items()
+            if now - usage.loaded_at >= self.refresh_interval
+            and user_id not in self._pending and user_id not in self._loading
+            and (user_id not in self._buckets or self._buckets[user_id].fill_ratio() >= 1.0)
+        ]
+        for user_id in idle:
+            del self._usage[user_id]
+            self._buckets.pop(user_id, None)
+        return len(idle)
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+            self.evict_idle()
+
+    def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_periodically())
+
+    async def stop(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+
+class AdmissionController:
+    """
+    Bound the number of concurrent searches, queueing the rest by priority
+
+    When the queue is full the lowest-priority request (queued or arriving)
+    is shed with OverloadedError.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._active = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+    def _shed_worst_queued(self, priority: int) -> bool:
+        worst = max(self._queue)
+        if worst[0] <= priority:
+            return False
+        self._queue.remove(worst)
+        heapq.heapify(self._queue)
+        worst[2].set_exception(OverloadedError("Server is busy, please retry"))
+        return True
+
+    async def _acquire(self, priority: int):
+        if self._active < self.max_concurrent and not self._queue:
+            self._active += 1
+            return
+
+        if len(self._queue) >= self.max_queue and not self._shed_worst_queued(priority):
+            raise OverloadedError("Server is busy, please retry")
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._sequence), waiter)
+        heapq.heappush(self._queue, entry)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if entry in self._queue:
+                self._queue.remove(entry)
+                heapq.heapify(self._queue)
+            elif waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                # We were handed a slot just as we were cancelled; pass it on
+                self._release()
+            raise
+
+    def _release(self):
+        while self._queue:
+            _, _, waiter = heapq.heappop(self._queue)
+            if not waiter.done():
+                # Hand the slot straight to the next waiter; _active is unchanged
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def admit(self, priority: int = 0):
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+search_quota = SearchQuotaManager(
+    rate_per_minute=settings.SEARCH_RATE_PER_MINUTE,
+    burst=settings.SEARCH_BURST,
+    default_monthly_limit=settings.DEFAULT_MONTHLY_SEARCH_LIMIT,
+    flush_interval=settings.SEARCH_QUOTA_FLUSH_SECONDS,
+    refresh_interval=settings.SEARCH_QUOTA_REFRESH_SECONDS,
+)
+
+search_admission = AdmissionController(
+    max_concurrent=settings.SEARCH_MAX_CONCURRENT,
+    max_queue=settings.SEARCH_MAX_QUEUE,
+)
@@ -1,14 +1,20 @@
 from typing import List, Dict, Any
+import asyncio
 import os
+import random
 from datetime import datetime
 import json
 
 from app.core.config import settings
-from app.schemas.search import SearchResult
+from app.schemas.search import SearchResult, SearchFilter, QueryPlan
 from app.schemas.auth import UserResponse
 from app.utils.supabase_client import get_supabase_client
 from app.services.embeddings import generate_embedding
-from app.services.supabase import semantic_search
+from app.services.supabase import fetch_profiles_by_ids, semantic_search
+from app.services.sharding import get_search_coordinator
+from app.services.executors import map_in_process, run_in_thread
+from app.services.embedding_models import get_embedding_model_state
+from app.services.profile_cards import profile_card_store
 from app.schemas.profiles import Profile
 from app.schemas.embeddings import QueryEmbedding
 
@@ -17,23 +23,190 @@ import logging
 # Set up logging
 logger = logging.getLogger(__name__)
 
-async def search_profiles(query: str) -> List[SearchResult]:
-    """Search for LinkedIn profiles using semantic search"""
-    # Generate query embedding
-    embedding = await generate_embedding(query)
-    
-    # Create QueryEmbedding object
-    query_embedding = QueryEmbedding(
+async def embed_query(query: str, embedding_model: str) -> QueryEmbedding:
+    """Embed a search query with the given model tag"""
+    embedding = await generate_embedding(query, embedding_model)
+    return QueryEmbedding(
         query=query,
         embedding=embedding,
-        embedding_model="text-embedding-ada-002"
+        embedding_model=embedding_model
     )
+
+def overlap_at_k(reference: List[Dict[str, Any]], candidate: List[Dict[str, Any]]) -> float:
+    """Fraction of the reference result ids that also appear in the candidate results"""
+    reference_ids = {str(row['id']) for row in reference}
+    if not reference_ids:
+        return 1.0
+    return len(reference_ids & {str(row['id']) for row in candidate}) / len(reference_ids)
+
+# Strong references to fire-and-forget dual-read tasks; the event loop only keeps weak ones
+_background_tasks = set()
+
+async def _dual_read(query: str, active_results: List[Dict[str, Any]], shadow_model: str):
+    """Run the same search against the shadow model and log how well it agrees"""
+    try:
+        shadow_embedding = await embed_query(query, shadow_model)
+        shadow_results = await run_in_thread(semantic_search, shadow_embedding)
+        logger.info(
+            f"Dual-read {shadow_model}: overlap@{len(active_results)}="
+            f"{overlap_at_k(active_results, shadow_results):.2f} for {query!r}"
+        )
+    except Exception as e:
+        logger.error(f"Dual-read against {shadow_model} failed: {e}")
+
+async def search_profiles(query: str, match_count: int = 10) -> List[SearchResult]:
+    """Search for LinkedIn profiles using semantic search"""
+    model_state = get_embedding_model_state()
+    
+    # Embed the query with the active model; the search only compares vectors from that model
+    query_embedding = await embed_query(query, model_state.active_model)
     
-    # Perform semantic search
-    results = semantic_search(query_embedding)
+    # Perform semantic search, fanning out to the index shards when they are running
+    coordinator = get_search_coordinator()
+    if coordinator and coordinator.embedding_model != query_embedding.embedding_model:
+        logger.warning(
+            f"Search shards hold {coordinator.embedding_model} vectors but "
+            f"{query_embedding.embedding_model} is active; querying Supabase instead"
+        )
+        coordinator = None
+    if coordinator:
+        sharded = await coordinator.search(query_embedding.embedding, match_count)
+        if sharded.is_partial:
+            logger.warning(f"Search for {query!r} missing shards {sharded.failed_shards}")
+        results = sharded.rows
+    else:
+        # The Supabase client is synchronous; run the RPC on a worker thread
+        results = await run_in_thread(semantic_search, query_embedding, match_count)
     
     results.sort(key=lambda x: x.get('similarity'), reverse=True)
     
+    # While a shadow index is being built, sample live queries to compare recall
+    if model_state.shadow_model and random.random() < settings.EMBEDDING_DUAL_READ_SAMPLE_RATE:
+        task = asyncio.ensure_future(_dual_read(query, results, model_state.shadow_model))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+    
+    return await hydrate_results(results)
+
+async def hydrate_results(results: List[Dict[str, Any]]) -> List[SearchResult]:
+    """Turn ranked search rows into SearchResults"""
+    # Rows from card-store-backed shards carry only ids; full rows from the
+    # search RPC are hydrated as they are so summary and raw_profile_data survive
+    if any('full_name' not in row for row in results):
+        return await _hydrate_from_cards(results)
+    
+    # Building hundreds of Profile models is pure-Python work; keep large
+    # result sets off the event loop so small searches are not starved
+    if len(results) >= settings.HYDRATION_OFFLOAD_THRESHOLD:
+        return await map_in_process(build_search_results, results, settings.HYDRATION_CHUNK_SIZE)
+    return build_search_results(results)
+
+async def _hydrate_from_cards(results: List[Dict[str, Any]]) -> List[SearchResult]:
+    """
+    Fill in id-only shard hits from the profile card store
+    
+    Rows that already carry the profile are built as they are. Profiles
+    written since the store was last refreshed (e.g. by the frontend signup
+    route) are fetched from Supabase instead; hits whose profile no longer
+    exists are dropped.
+    """
+    known_ids, dense_hits, full_rows, missing = [], [], [], []
+    for row in results:
+        if 'full_name' in row:
+            full_rows.append(row)
+            continue
+        dense_id = profile_card_store.dense_id(row['id'])
+        if dense_id is None:
+            missing.append(row)
+        else:
+            known_ids.append(str(row['id']))
+            dense_hits.append((dense_id, row['similarity']))
+    hydrated = dict(zip(known_ids, profile_card_store.hydrate_dense(dense_hits)))
+    
+    if missing:
+        similarities = {str(row['id']): row['similarity'] for row in missing}
+        rows = await run_in_thread(fetch_profiles_by_ids, list(similarities))
+        full_rows.extend(dict(row, similarity=similarities[str(row['id'])]) for row in rows)
+        if len(rows) < len(missing):
+            logger.info(f"Dropped {len(missing) - len(rows)} search hits for deleted profiles")
+    for result in build_search_results(full_rows):
+        hydrated[str(result.profile.id)] = result
+    
+    return [hydrated[str(row['id'])] for row in results if str(row['id']) in hydrated]
+
+async def _retrieve(query_embedding: QueryEmbedding, match_count: int) -> List[Dict[str, Any]]:
+    coordinator = get_search_coordinator()
+    if coordinator and coordinator.embedding_model == query_embedding.embedding_model:
+        return (await coordinator.search(query_embedding.embedding, match_count)).rows
+    return await run_in_thread(semantic_search, query_embedding, match_count)
+
+def _field_values(data: Any, path: List[str]) -> List[Any]:
+    """Collect every value at a dotted raw_profile_data path, descending into lists"""
+    if isinstance(data, list):
+        return [value for item in data for value in _field_values(item, path)]
+    if not path:
+        return [data]
+    if isinstance(data, dict) and path[0] in data:
+        return _field_values(data[path[0]], path[1:])
+    return []
+
+def matches_filter(row: Dict[str, Any], search_filter: SearchFilter) -> bool:
+    """Check a result row against a planner filter (case-insensitive)"""
+    source = dict(row.get('raw_profile_data') or {}, **{k: v for k, v in row.items() if k != 'raw_profile_data'})
+    expected = search_filter.value.strip('%').lower()
+    for value in _field_values(source, search_filter.field.split('.')):
+        if value is None:
+            continue
+        value = str(value).lower()
+        if search_filter.operator.upper() == 'ILIKE':
+            if expected in value:
+                return True
+        elif value == expected:
+            return True
+    return False
+
+async def search_with_plan(plan: QueryPlan, match_count: int = 10) -> List[SearchResult]:
+    """
+    Retrieve profiles for a QueryPlan
+    
+    Every key phrase is searched concurrently. A profile scores its best
+    similarity among the phrases that retrieved it for each trait, averaged
+    over all traits, so profiles matching more traits rank higher. Profiles
+    passing more of the plan's filters rank ahead of the rest.
+    """
+    phrase_results = await asyncio.gather(*(
+        _retrieve(QueryEmbedding(query=phrase.key_phrase, embedding=embedding, embedding_model=plan.embedding_model),
+                  match_count * 2)
+        for phrase, embedding in zip(plan.key_phrases, plan.phrase_embeddings)
+    ))
+    
+    rows: Dict[str, Dict[str, Any]] = {}
+    trait_scores: Dict[str, Dict[str, float]] = {}
+    highlights: Dict[str, List[str]] = {}
+    for phrase, results in zip(plan.key_phrases, phrase_results):
+        trait = phrase.corresponding_trait or phrase.key_phrase
+        for row in results:
+            profile_id = str(row['id'])
+            rows.setdefault(profile_id, row)
+            scores = trait_scores.setdefault(profile_id, {})
+            scores[trait] = max(scores.get(trait, 0.0), row['similarity'])
+            highlights.setdefault(profile_id, []).append(phrase.key_phrase)
+    
+    ranked = []
+    for profile_id, row in rows.items():
+        score = sum(trait_scores[profile_id].values()) / len(plan.traits)
+        passed = sum(matches_filter(row, search_filter) for search_filter in plan.filters)
+        ranked.append((passed, score, profile_id))
+    ranked.sort(reverse=True)
+    ranked = ranked[:match_count]
+    
+    results = await hydrate_results([dict(rows[profile_id], similarity=score) for _, score, profile_id in ranked])
+    for result in results:
+        result.highlights = list(dict.fromkeys(highlights[str(result.profile.id)]))
+    return results
+
+def build_search_results(results: List[Dict[str, Any]]) -> List[SearchResult]:
+    """Hydrate search_profiles_by_embedding rows into SearchResult models"""
     profiles = []
     
     """TABLE(id uuid, user_id uuid, full_name text, headline text, industry text, location text, profile_picture_url text, summary text, similarity double precision)"""
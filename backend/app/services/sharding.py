@@ -0,0 +1,334 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+def shard_for(profile_id, shard_count: int) -> int:
+    """
+    Map a profile id onto one of shard_count partitions
+
+    Uses a stable hash (not Python's salted hash()) so every process agrees on placement.
+    """
+    digest = hashlib.md5(str(profile_id).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard_count
+
+
+def partition_rows(rows: List[Dict[str, Any]], shard_count: int) -> List[List[Dict[str, Any]]]:
+    """Split profile rows into shard_count partitions by id hash"""
+    partitions = [[] for _ in range(shard_count)]
+    for row in rows:
+        partitions[shard_for(row["id"], shard_count)].append(row)
+    return partitions
+
+
+def shard_row(row: Dict[str, Any], embedding: List[float], ids_only: bool) -> Dict[str, Any]:
+    """
+    The row a shard stores for a profile
+
+    With ids_only (the profile card store is on) hits are hydrated from the
+    card store, so shards keep just the ids and the vector.
+    """
+    if ids_only:
+        return {"id": row["id"], "user_id": row["user_id"], "embedding": embedding}
+    return dict(row, embedding=embedding)
+
+
+def _normalize(vector) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return [0.0 for _ in vector]
+    return [x / norm for x in vector]
+
+
+# ---------------------------------------------------------------------------
+# Shard worker process state. Each worker process owns exactly one partition.
+# ---------------------------------------------------------------------------
+
+_partition: Dict[str, Dict[str, Any]] = {}
+_partition_vectors: Dict[str, List[float]] = {}
+
+
+def _add_to_partition(row: Dict[str, Any]) -> None:
+    row = dict(row)
+    profile_id = str(row["id"])
+    _partition_vectors[profile_id] = _normalize(row.pop("embedding"))
+    _partition[profile_id] = row
+
+
+def _add_rows_to_partition(rows: List[Dict[str, Any]]) -> None:
+    for row in rows:
+        _add_to_partition(row)
+
+
+def _load_partition(rows: List[Dict[str, Any]]) -> None:
+    _partition.clear()
+    _partition_vectors.clear()
+    _add_rows_to_partition(rows)
+
+
+def _remove_profiles_from_partition(profile_ids: List[str]) -> int:
+    doomed = [profile_id for profile_id in profile_ids if profile_id in _partition]
+    for profile_id in doomed:
+        del _partition[profile_id]
+        del _partition_vectors[profile_id]
+    return len(doomed)
+
+
+def _remove_users_from_partition(user_ids: List[str]) -> int:
+    user_ids = set(user_ids)
+    return _remove_profiles_from_partition(
+        [pid for pid, row in _partition.items() if str(row.get("user_id")) in user_ids]
+    )
+
+
+def _partition_size() -> int:
+    return len(_partition)
+
+
+def _partition_ids() -> List[str]:
+    return list(_partition)
+
+
+def _partition_top_k(query: List[float], match_count: int, match_threshold: float) -> List[Dict[str, Any]]:
+    """Score every profile in this partition and return the best match_count, best first"""
+    scored = []
+    for profile_id, vector in _partition_vectors.items():
+        similarity = sum(q * v for q, v in zip(query, vector))
+        if similarity > match_threshold:
+            scored.append((similarity, profile_id))
+
+    top = heapq.nlargest(match_count, scored)
+    return [dict(_partition[profile_id], similarity=similarity) for similarity, profile_id in top]
+
+
+# ---------------------------------------------------------------------------
+# Coordinator side
+# ---------------------------------------------------------------------------
+
+class ShardReplica:
+    """A single local process serving top-k queries over one partition"""
+
+    def __init__(self, rows: List[Dict[str, Any]]):
+        self._executor = ProcessPoolExecutor(
+            max_workers=1,
+            initializer=_load_partition,
+            initargs=(rows,),
+        )
+
+    async def call(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class IndexShard:
+    """
+    One partition of the index, served by one or more identical replicas
+
+    Queries go to the primary replica first. If it has not answered after
+    hedge_after seconds, the same query is sent to the next replica and the
+    first answer wins.
+    """
+
+    def __init__(self, shard_id: int, rows: List[Dict[str, Any]], replicas: int = 2):
+        self.shard_id = shard_id
+        self.replicas = [ShardReplica(rows) for _ in range(max(1, replicas))]
+        self._next_primary = 0
+
+    async def top_k(self, query: List[float], match_count: int, match_threshold: float,
+                    hedge_after: Optional[float] = None) -> List[Dict[str, Any]]:
+        # Rotate the primary so load spreads across replicas
+        order = self.replicas[self._next_primary:] + self.replicas[:self._next_primary]
+        self._next_primary = (self._next_primary + 1) % len(self.replicas)
+
+        pending = set()
+        errors = []
+        try:
+            for index, replica in enumerate(order):
+                pending.add(asyncio.ensure_future(
+                    replica.call(_partition_top_k, query, match_count, match_threshold)
+                ))
+                is_last = index == len(order) - 1
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=None if is_last or hedge_after is None else hedge_after,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+                if not is_last:
+                    logger.debug(f"Hedging request to shard {self.shard_id} (replica {index + 1})")
+
+            # Every replica has been tried; wait for whichever hedges are still running
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(task.exception())
+
+            raise errors[-1]
+        finally:
+            # Losing hedges, and every request when the caller times out and
+            # cancels us; a query still queued on a replica is dropped
+            for straggler in pending:
+                straggler.cancel()
+
+    async def broadcast(self, fn, *args):
+        """Apply a state change to every replica of this shard"""
+        return await asyncio.gather(*(replica.call(fn, *args) for replica in self.replicas))
+
+    def close(self):
+        for replica in self.replicas:
+            replica.close()
+
+
+class ShardedSearchResult:
+    def __init__(self, rows: List[Dict[str, Any]], failed_shards: List[int]):
+        self.rows = rows
+        self.failed_shards = failed_shards
+
+    @property
+    def is_partial(self) -> bool:
+        return bool(self.failed_shards)
+
+
+class ShardedSearchCoordinator:
+    """
+    Scatter a query to every shard and merge the partial top-k lists
+
+    Shards that fail or exceed shard_timeout are left out of the merge and
+    reported in failed_shards instead of failing the whole search.
+
+    upsert_profile and remove_user only see writes made through the backend;
+    app.services.index_refresh applies profiles written or deleted by the
+    frontend every SEARCH_INDEX_REFRESH_SECONDS.
+    """
+
+    def __init__(self, shards: List[IndexShard], shard_timeout: float = 2.0,
+                 hedge_after: Optional[float] = 0.15, embedding_model: Optional[str] = None):
+        self.shards = shards
+        # Model tag of the vectors the shards hold; queries must use the same model
+        self.embedding_model = embedding_model
+        self.shard_timeout = shard_timeout
+        self.hedge_after = hedge_after
+
+    async def warm_up(self) -> int:
+        """Start every shard process and load its partition; returns the number of profiles served"""
+        sizes = await asyncio.gather(*(shard.broadcast(_partition_size) for shard in self.shards))
+        return sum(replica_sizes[0] for replica_sizes in sizes)
+
+    async def _query_shard(self, shard: IndexShard, query, match_count, match_threshold):
+        return await asyncio.wait_for(
+            shard.top_k(query, match_count, match_threshold, self.hedge_after),
+            timeout=self.shard_timeout,
+        )
+
+    async def search(self, embedding: List[float], match_count: int = 10,
+                     match_threshold: float = 0.5) -> ShardedSearchResult:
+        query = _normalize([float(x) for x in embedding])
+        partials = await asyncio.gather(
+            *(self._query_shard(shard, query, match_count, match_threshold) for shard in self.shards),
+            return_exceptions=True,
+        )
+
+        failed_shards = []
+        ranked_lists = []
+        for shard, partial in zip(self.shards, partials):
+            if isinstance(partial, BaseException):
+                reason = "timed out" if isinstance(partial, asyncio.TimeoutError) else repr(partial)
+                logger.warning(f"Shard {shard.shard_id} {reason}; returning partial results")
+                failed_shards.append(shard.shard_id)
+            else:
+                ranked_lists.append(partial)
+
+        # Each partial list is already sorted best-first, so a k-way heap merge suffices
+        merged = heapq.merge(*ranked_lists, key=lambda row: row["similarity"], reverse=True)
+        return ShardedSearchResult(list(itertools.islice(merged, match_count)), failed_shards)
+
+    async def upsert_profile(self, row: Dict[str, Any]) -> None:
+        """Route a new or updated profile row (with "embedding") to its owning shard"""
+        await self.upsert_profiles([row])
+
+    async def upsert_profiles(self, rows: List[Dict[str, Any]]) -> None:
+        """Route new or updated profile rows (with "embedding") to their owning shards"""
+        if not rows:
+            return
+        # A user's previous profile may live under another id, on another shard
+        await self._remove_users([str(row["user_id"]) for row in rows])
+        await asyncio.gather(*(
+            self.shards[shard_id].broadcast(_add_rows_to_partition, partition)
+            for shard_id, partition in enumerate(partition_rows(rows, len(self.shards))) if partition
+        ))
+
+    async def remove_user(self, user_id: str) -> None:
+        await self._remove_users([str(user_id)])
+
+    async def _remove_users(self, user_ids: List[str]) -> None:
+        # Partitions are keyed by profile id, so user deletes go to every shard
+        await asyncio.gather(*(shard.broadcast(_remove_users_from_partition, user_ids)
+                               for shard in self.shards))
+
+    async def remove_profiles(self, profile_ids: Iterable[str]) -> None:
+        partitions = [[] for _ in self.shards]
+        for profile_id in profile_ids:
+            partitions[shard_for(profile_id, len(self.shards))].append(str(profile_id))
+        await asyncio.gather(*(
+            shard.broadcast(_remove_profiles_from_partition, partition)
+            for shard, partition in zip(self.shards, partitions) if partition
+        ))
+
+    async def profile_ids(self) -> Set[str]:
+        """Ids of every profile the shards hold, read from each shard's first replica"""
+        partitions = await asyncio.gather(*(shard.replicas[0].call(_partition_ids) for shard in self.shards))
+        return {profile_id for partition in partitions for profile_id in partition}
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+
+def build_local_coordinator(rows: List[Dict[str, Any]], shard_count: int, replicas: int = 2,
+                            shard_timeout: float = 2.0,
+                            hedge_after: Optional[float] = 0.15,
+                            embedding_model: Optional[str] = None) -> ShardedSearchCoordinator:
+    """
+    Partition rows across shard_count local shard processes
+
+    Args:
+        rows: Profile rows, each with an "embedding" list of floats
+        shard_count: Number of partitions
+        replicas: Processes per partition (hedged requests need at least 2)
+        shard_timeout: Seconds to wait for a shard before dropping it from the merge
+        hedge_after: Seconds before a slow shard's query is duplicated to another replica
+        embedding_model: Model tag the row embeddings were generated with
+    """
+    shards = [
+        IndexShard(shard_id, partition, replicas)
+        for shard_id, partition in enumerate(partition_rows(rows, shard_count))
+    ]
+    return ShardedSearchCoordinator(shards, shard_timeout, hedge_after, embedding_model)
+
+
+_coordinator: Optional[ShardedSearchCoordinator] = None
+
+
+def get_search_coordinator() -> Optional[ShardedSearchCoordinator]:
+    """Get the process-wide coordinator, or None when sharded search is disabled"""
+    return _coordinator
+
+
+def set_search_coordinator(coordinator: Optional[ShardedSearchCoordinator]) -> None:
+    global _coordinator
+    _coordinator = coordinator
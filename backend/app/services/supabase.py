@@ -1,11 +1,14 @@
 from supabase import create_client
 import os
-from app.schemas.profiles import Profile
+from app.schemas.profiles import Profile, ProfileWrite
+from typing import List
 import pydantic
 from app.schemas.embeddings import ProfileEmbedding, QueryEmbedding
 import uuid
 from app.utils.supabase_client import get_supabase_client, get_schema_client
 from datetime import datetime
+import json
+from app.services.embedding_models import get_active_embedding_model
 
 # Get the default client
 supabase = get_supabase_client()
@@ -28,7 +31,7 @@ def check_user_exists(user_id, schema_name="linkedin_profiles"):
     
     return response.data
 
-def store_profile_in_supabase(user_id: str, linkedin_profile: Profile, profile_embedding: ProfileEmbedding, schema_name="linkedin_profiles"):
+def store_profile_in_supabase(user_id: str, linkedin_profile: Profile, profile_embedding: ProfileEmbedding, schema_name="linkedin_profiles", embedding_model: str = None):
     """
     Store a LinkedIn profile in Supabase
     Args:
@@ -36,62 +39,76 @@ def store_profile_in_supabase(user_id: str, linkedin_profile: Profile, profile_e
         linkedin_profile: Profile object containing LinkedIn profile data (validated by pydantic)
         profile_embedding: Vector embedding of the profile text
         schema_name: Optional schema name (default: "public")
+        embedding_model: Model tag the embedding was generated with (default: the active model)
+    Returns:
+        The id of the stored profile (an existing profile for user_id keeps its id)
+    """
+    write = ProfileWrite(
+        profile=linkedin_profile.model_copy(update={"user_id": uuid.UUID(str(user_id))}),
+        embeddings={embedding_model or get_active_embedding_model(): profile_embedding},
+    )
+    return store_profiles_batch([write], schema_name)[0]
+
+def store_profiles_batch(writes: List[ProfileWrite], schema_name="linkedin_profiles"):
+    """
+    Upsert profiles with their embeddings in a single RPC call
+    
+    The whole batch is written in one transaction, so a profile is never left
+    without its embedding. Profiles are matched on user_id, so retrying a
+    write is safe. Section chunks are only generated (and passed to the same
+    RPC) by the frontend signup route.
+    Args:
+        writes: Profiles to store (already validated by pydantic)
+        schema_name: Optional schema name (default: "linkedin_profiles")
+    Returns:
+        The stored profile ids, in the same order as writes
     """
-    # Use the specified schema
     client = get_schema_client(schema_name) if schema_name != "public" else supabase
     
     if not client:
         raise ValueError("Supabase client not initialized")
-        
-    # Validate profile data using pydantic model
-    try:
-        # Profile model will validate the data
-        validated_profile = Profile(
-            id=linkedin_profile.id,
-            user_id=user_id,
-            linkedin_id=linkedin_profile.linkedin_id,
-            full_name=linkedin_profile.full_name,
-            headline=linkedin_profile.headline,
-            industry=linkedin_profile.industry,
-            location=linkedin_profile.location,
-            profile_url=linkedin_profile.profile_url,
-            profile_picture_url=linkedin_profile.profile_picture_url,
-            summary=linkedin_profile.summary,
-            raw_profile_data=linkedin_profile.raw_profile_data,
-            created_at=linkedin_profile.created_at,
-            updated_at=linkedin_profile.updated_at
-        )
-        
-        # Convert to dict for Supabase storage
-        profile_data = validated_profile.model_dump()
-        # Convert UUID and datetime to strings
-        profile_data["id"] = str(profile_data["id"])
-        profile_data["user_id"] = str(profile_data["user_id"])
-        profile_data["created_at"] = profile_data["created_at"].isoformat()
-        profile_data["updated_at"] = profile_data["updated_at"].isoformat()
-        
-        response = client.table("profiles").insert(profile_data).execute()
-        
-    except pydantic.ValidationError as e:
-        raise ValueError(f"Invalid profile data: {str(e)}")
-      
+    
+    if not writes:
+        return []
+    
+    # mode="json" turns UUIDs and datetimes into strings without re-validating
+    payload = [write.model_dump(mode="json") for write in writes]
+    response = client.rpc("upsert_profiles_with_embeddings", {"payload": payload}).execute()
+    
+    stored_ids = {row["stored_user_id"]: row["stored_profile_id"] for row in response.data}
+    return [uuid.UUID(stored_ids[str(write.profile.user_id)]) for write in writes]
+
+def store_profile_embedding(profile_id, profile_embedding: list, embedding_model: str, schema_name="linkedin_profiles"):
+    """
+    Store (or replace) a profile's embedding for one embedding model
+    Args:
+        profile_id: The profile's ID
+        profile_embedding: Vector embedding of the profile text
+        embedding_model: Model tag the embedding was generated with, e.g. "text-embedding-3-small@512"
+        schema_name: Optional schema name (default: "linkedin_profiles")
+    """
+    client = get_schema_client(schema_name) if schema_name != "public" else supabase
+    
+    if not client:
+        raise ValueError("Supabase client not initialized")
+    
     try:
         validated_embedding = ProfileEmbedding(
             id=uuid.uuid4(),
-            profile_id=validated_profile.id,
+            profile_id=profile_id,
             embedding=profile_embedding,
-            embedding_model="openai",
+            embedding_model=embedding_model,
             created_at=datetime.now()
         )
        
         embedding_data = validated_embedding.model_dump()
         embedding_data["id"] = str(embedding_data["id"])
         embedding_data["profile_id"] = str(embedding_data["profile_id"])
-        embedding_data["embedding"] = embedding_data["embedding"]
-        embedding_data["embedding_model"] = embedding_data["embedding_model"] 
         embedding_data["created_at"] = embedding_data["created_at"].isoformat()
         
-        response = client.table("profile_embeddings").insert(embedding_data).execute()
+        response = client.table("profile_embeddings").upsert(
+            embedding_data, on_conflict="profile_id,embedding_model"
+        ).execute()
         
     except pydantic.ValidationError as e:
         raise ValueError(f"Invalid profile data: {str(e)}")
@@ -130,11 +147,198 @@ def semantic_search(query_embedding: QueryEmbedding, match_count: int = 10, matc
   # Ensure embedding is a list of floats
   embedding_list = [float(x) for x in query_embedding.embedding]
   
-  response = supabase.rpc("search_profiles_by_embedding", 
+  # Only vectors from the query's own model are compared
+  response = client.rpc("search_profiles_by_embedding_model", 
                           {
                            "query_embedding": embedding_list,
                            "match_threshold": float(match_threshold),
-                           "match_count": int(match_count)
+                           "match_count": int(match_count),
+                           "model_tag": query_embedding.embedding_model
                           }).execute()
   
-  return response.data
\ No newline at end of file
+  return response.data
+
+def fetch_profiles_with_embeddings(embedding_model: str, page_size: int = 1000, schema_name="linkedin_profiles",
+                                   updated_since: str = None):
+  """
+  Fetch every profile together with its stored embedding for one model
+  Args:
+      embedding_model: Model tag whose embeddings should be returned
+      page_size: Number of rows requested per round-trip
+      schema_name: Optional schema name (default: "linkedin_profiles")
+      updated_since: Optional ISO timestamp; only profiles updated at or after it are returned
+  Returns:
+      List of profile rows shaped like search_profiles_by_embedding results,
+      with an extra "embedding" key holding a list of floats
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  rows = []
+  start = 0
+  while True:
+      query = client.table("profiles").select(
+          "id, user_id, linkedin_id, full_name, headline, industry, location, "
+          "profile_url, profile_picture_url, summary, raw_profile_data, "
+          "created_at, updated_at, profile_embeddings!inner(embedding)"
+      ).eq("profile_embeddings.embedding_model", embedding_model)
+      if updated_since:
+          query = query.gte("updated_at", updated_since)
+      response = query.order("id").range(start, start + page_size - 1).execute()
+
+      for row in response.data:
+          embeddings = row.pop("profile_embeddings", None) or []
+          if not embeddings or not embeddings[0].get("embedding"):
+              continue
+          # pgvector columns come back from PostgREST as "[0.1,0.2,...]" strings
+          embedding = embeddings[0]["embedding"]
+          if isinstance(embedding, str):
+              embedding = json.loads(embedding)
+          row["embedding"] = [float(x) for x in embedding]
+          rows.append(row)
+
+      if len(response.data) < page_size:
+          break
+      start += page_size
+
+  return rows
+
+
+
+def fetch_profiles_by_ids(profile_ids: List[str], schema_name="linkedin_profiles"):
+  """
+  Fetch full profile rows by id, for search hits the profile card store does not know yet
+  Args:
+      profile_ids: Ids of the profiles to fetch
+      schema_name: Optional schema name (default: "linkedin_profiles")
+  Returns:
+      List of profile rows shaped like search_profiles_by_embedding results, without similarity
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  response = client.table("profiles").select(
+      "id, user_id, linkedin_id, full_name, headline, industry, location, "
+      "profile_url, profile_picture_url, summary, raw_profile_data, "
+      "created_at, updated_at"
+  ).in_("id", profile_ids).execute()
+  return response.data
+
+
+
+def fetch_profiles_page(start: int, page_size: int, schema_name="linkedin_profiles"):
+  """
+  Fetch one page of profiles ordered by id
+  Args:
+      start: Offset of the first row
+      page_size: Number of rows to fetch
+      schema_name: Optional schema name (default: "linkedin_profiles")
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  response = client.table("profiles").select("*").order("id").range(start, start + page_size - 1).execute()
+  return [
+      Profile(**dict(row, full_name=row.get("full_name") or "", raw_profile_data=row.get("raw_profile_data") or {}))
+      for row in response.data
+  ]
+
+
+def fetch_embedded_profile_ids(embedding_model: str, schema_name="linkedin_profiles"):
+  """
+  Get the ids of profiles that already have an embedding for embedding_model
+  Args:
+      embedding_model: Model tag to look for
+      schema_name: Optional schema name (default: "linkedin_profiles")
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  profile_ids = set()
+  start = 0
+  page_size = 1000
+  while True:
+      response = client.table("profile_embeddings").select("profile_id").eq(
+          "embedding_model", embedding_model
+      ).order("profile_id").range(start, start + page_size - 1).execute()
+      profile_ids.update(row["profile_id"] for row in response.data)
+      if len(response.data) < page_size:
+          break
+      start += page_size
+  return profile_ids
+
+
+def count_profiles(schema_name="linkedin_profiles") -> int:
+  """
+  Count the rows in profiles
+  Args:
+      schema_name: Optional schema name (default: "linkedin_profiles")
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  response = client.table("profiles").select("id", count="exact").limit(1).execute()
+  return response.count or 0
+
+
+def fetch_profile_ids(page_size: int = 1000, schema_name="linkedin_profiles"):
+  """
+  Get the ids of every profile, to find profiles deleted since the in-memory indexes were loaded
+  Args:
+      page_size: Number of rows requested per round-trip
+      schema_name: Optional schema name (default: "linkedin_profiles")
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  profile_ids = set()
+  start = 0
+  while True:
+      response = client.table("profiles").select("id").order("id").range(start, start + page_size - 1).execute()
+      profile_ids.update(str(row["id"]) for row in response.data)
+      if len(response.data) < page_size:
+          break
+      start += page_size
+  return profile_ids
+
+
+def fetch_profile_cards(page_size: int = 1000, schema_name="linkedin_profiles", updated_since: str = None):
+  """
+  Fetch the display fields of every profile, for the in-memory profile card store
+  Args:
+      page_size: Number of rows requested per round-trip
+      schema_name: Optional schema name (default: "linkedin_profiles")
+      updated_since: Optional ISO timestamp; only profiles updated at or after it are returned
+  """
+  client = get_schema_client(schema_name) if schema_name != "public" else supabase
+
+  if not client:
+      raise ValueError("Supabase client not initialized")
+
+  rows = []
+  start = 0
+  while True:
+      query = client.table("profiles").select(
+          "id, user_id, full_name, headline, industry, location, "
+          "profile_picture_url, profile_url, created_at, updated_at"
+      )
+      if updated_since:
+          query = query.gte("updated_at", updated_since)
+      response = query.order("id").range(start, start + page_size - 1).execute()
+      rows.extend(response.data)
+      if len(response.data) < page_size:
+          break
+      start += page_size
+  return rows
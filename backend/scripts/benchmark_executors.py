@@ -0,0 +1,96 @@
+"""
+Benchmark heavy result hydration alongside lightweight requests.
+
+Runs a batch of large searches (each hydrating --rows Profile models) while a
+stream of lightweight requests measures how long they wait on the event loop,
+first with hydration inline and then offloaded to the process pool.
+
+    python scripts/benchmark_executors.py --searches 16 --rows 600
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.config import settings
+from app.services.executors import map_in_process, shutdown_executors
+from app.services.search import build_search_results
+
+
+def synthetic_rows(count: int):
+    rng = random.Random(42)
+    now = datetime.now().isoformat()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": str(uuid.uuid4()),
+            "full_name": f"Profile {i}",
+            "headline": "Software Engineer",
+            "location": "New York",
+            "raw_profile_data": {
+                "experiences": [{"company": f"Company {j}", "title": "Engineer"} for j in range(8)],
+                "skills": [{"name": f"Skill {j}"} for j in range(15)],
+            },
+            "created_at": now,
+            "updated_at": now,
+            "similarity": rng.random(),
+        }
+        for i in range(count)
+    ]
+
+
+async def light_requests(stop: asyncio.Event, latencies: list):
+    # A lightweight request needs the loop for ~nothing; any delay is queueing behind heavy work
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        latencies.append(time.perf_counter() - started - 0.005)
+
+
+async def run(mode: str, searches: int, rows):
+    async def heavy():
+        if mode == "inline":
+            return build_search_results(rows)
+        return await map_in_process(build_search_results, rows, settings.HYDRATION_CHUNK_SIZE)
+
+    if mode == "process":
+        # Start the pool before timing
+        await map_in_process(build_search_results, rows[:1], 1)
+
+    stop = asyncio.Event()
+    latencies = []
+    light = asyncio.create_task(light_requests(stop, latencies))
+    started = time.perf_counter()
+    await asyncio.gather(*(heavy() for _ in range(searches)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await light
+
+    latencies.sort()
+    worst = latencies[-1] * 1000 if latencies else 0.0
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0.0
+    print(f"{mode:<8} heavy throughput={searches / elapsed:6.1f} searches/s  "
+          f"light-request delay p95={p95:7.1f}ms max={worst:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--searches", type=int, default=16)
+    parser.add_argument("--rows", type=int, default=600)
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    asyncio.run(run("inline", args.searches, rows))
+    asyncio.run(run("process", args.searches, rows))
+    shutdown_executors()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark the in-memory profile card store.
+
+Loads --profiles synthetic profiles and reports memory per profile and the
+time to hydrate search hits, compared with building Profile models from RPC
+rows (the path used without the card store).
+
+    python scripts/benchmark_profile_cards.py --profiles 100000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.profile_cards import ProfileCardStore
+from app.services.search import build_search_results
+
+HEADLINES = ["Software Engineer", "Product Manager", "Data Scientist", "Founder", "Investor", "Designer"]
+INDUSTRIES = ["Technology", "Finance", "Venture Capital", "Healthcare", "Education"]
+LOCATIONS = ["New York", "San Francisco", "London", "Boston", "Seattle", "Austin"]
+
+RAW_PROFILE_DATA = {
+    "experiences": [{"company": f"Company {i}", "title": "Engineer", "description": "Built things. " * 10} for i in range(6)],
+    "education": [{"school": "State University", "degree_name": "BS"}],
+    "skills": [{"name": f"Skill {i}"} for i in range(15)],
+}
+
+
+def synthetic_rows(count: int):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc).isoformat()
+    for i in range(count):
+        profile_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        yield {
+            "id": profile_id,
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "full_name": f"Person {i}",
+            "headline": f"{rng.choice(HEADLINES)} at Company {rng.randrange(2000)}",
+            "industry": rng.choice(INDUSTRIES),
+            "location": rng.choice(LOCATIONS),
+            "profile_picture_url": f"https://media.example.com/{profile_id}.jpg",
+            "profile_url": f"https://www.linkedin.com/in/person-{i}",
+            "created_at": now,
+            "updated_at": now,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=100000)
+    parser.add_argument("--hits", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = list(synthetic_rows(args.profiles))
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    store = ProfileCardStore()
+    started = time.perf_counter()
+    store.load(rows)
+    load_seconds = time.perf_counter() - started
+    traced = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"{len(store)} profiles loaded in {load_seconds:.2f}s")
+    print(f"memory: {traced / 1e6:.1f} MB traced, {traced / len(store):.0f} bytes/profile "
+          f"(store estimate {store.memory_bytes() / len(store):.0f} bytes/profile)")
+
+    rng = random.Random(1)
+    for hit_count in args.hits:
+        sample = rng.sample(rows, hit_count)
+        hits = [(row["id"], rng.random()) for row in sample]
+        # search_profiles_by_embedding rows also carry the raw Proxycurl JSON
+        rpc_rows = [dict(row, raw_profile_data=RAW_PROFILE_DATA, similarity=score) for row, (_, score) in zip(sample, hits)]
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            store.hydrate(hits)
+        store_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+        dense_hits = [(store.dense_id(profile_id), score) for profile_id, score in hits]
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            store.hydrate_dense(dense_hits)
+        dense_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+        # Every hit missing the Profile cache, e.g. long-tail queries
+        cold_seconds = 0.0
+        for _ in range(args.repeat):
+            store._profiles.clear()
+            started = time.perf_counter()
+            store.hydrate_dense(dense_hits)
+            cold_seconds += time.perf_counter() - started
+        cold_ms = cold_seconds / args.repeat * 1000
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            build_search_results(rpc_rows)
+        rows_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+        print(f"hydrate {hit_count:>5} hits: by profile id {store_ms:8.3f}ms  "
+              f"by dense id {dense_ms:8.3f}ms (uncached {cold_ms:8.3f}ms)  "
+              f"Profile from RPC rows {rows_ms:8.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
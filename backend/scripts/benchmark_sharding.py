@@ -0,0 +1,80 @@
+"""
+Benchmark sharded scatter-gather search on one machine.
+
+Builds a synthetic corpus, partitions it across 1..N local shard processes and
+reports query latency and throughput for each shard count.
+
+    python scripts/benchmark_sharding.py --profiles 20000 --shards 1 2 4
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.sharding import build_local_coordinator
+
+
+def synthetic_rows(count: int, dimension: int):
+    rng = random.Random(42)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "full_name": f"Profile {i}",
+            "embedding": [rng.gauss(0, 1) for _ in range(dimension)],
+        }
+        for i in range(count)
+    ]
+
+
+async def run(rows, shard_count, queries, concurrency, replicas):
+    coordinator = build_local_coordinator(rows, shard_count, replicas=replicas, shard_timeout=30.0)
+    try:
+        await coordinator.warm_up()
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one(query):
+            async with semaphore:
+                started = time.perf_counter()
+                await coordinator.search(query, match_count=10, match_threshold=-1.0)
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(query) for query in queries))
+        elapsed = time.perf_counter() - started
+    finally:
+        coordinator.close()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"shards={shard_count:<3} p50={p50:8.1f}ms  p95={p95:8.1f}ms  qps={len(queries) / elapsed:7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profiles", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--replicas", type=int, default=1)
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.profiles, args.dimension)
+    rng = random.Random(7)
+    queries = [[rng.gauss(0, 1) for _ in range(args.dimension)] for _ in range(args.queries)]
+    print(f"{args.profiles} profiles, {args.dimension} dims, {args.queries} queries")
+    for shard_count in args.shards:
+        asyncio.run(run(rows, shard_count, queries, args.concurrency, args.replicas))
+
+
+if __name__ == "__main__":
+    main()
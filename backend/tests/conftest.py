@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# The OpenAI client is created at import time and refuses a missing key; tests never call it
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.services import embedding_models
+from app.services.embedding_models import EmbeddingModelState, get_embedding_model_state
+
+
+@pytest.fixture
+def state_reads(monkeypatch):
+    reads = []
+
+    def fetch_state(schema_name):
+        reads.append(threading.current_thread())
+        return EmbeddingModelState(f"model-{len(reads)}@8")
+
+    monkeypatch.setattr(embedding_models, "_fetch_state", fetch_state)
+    monkeypatch.setattr(embedding_models, "_cached_state", None)
+    monkeypatch.setattr(embedding_models, "_refresh_task", None)
+    return reads
+
+
+def expire_cache(monkeypatch):
+    monkeypatch.setattr(embedding_models, "_cached_at", float("-inf"))
+
+
+def test_expired_state_is_refreshed_off_the_event_loop(state_reads, monkeypatch):
+    async def run():
+        await embedding_models.refresh_embedding_model_state()
+        expire_cache(monkeypatch)
+        # Served from the cache while the refresh runs on the thread pool
+        stale = get_embedding_model_state()
+        assert get_embedding_model_state() is stale
+        await embedding_models._refresh_task
+        return stale, get_embedding_model_state()
+
+    stale, fresh = asyncio.run(run())
+    assert (stale.active_model, fresh.active_model) == ("model-1@8", "model-2@8")
+    assert len(state_reads) == 2
+    assert threading.main_thread() not in state_reads
+
+
+def test_state_is_read_synchronously_outside_the_event_loop(state_reads, monkeypatch):
+    assert get_embedding_model_state().active_model == "model-1@8"
+    expire_cache(monkeypatch)
+    assert get_embedding_model_state().active_model == "model-2@8"
+    assert state_reads == [threading.main_thread()] * 2
@@ -0,0 +1,66 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import executors
+
+
+def square_all(items):
+    return [item * item for item in items]
+
+
+def worker_pid():
+    return os.getpid()
+
+
+@pytest.fixture(autouse=True)
+def fresh_executors():
+    executors.shutdown_executors()
+    yield
+    executors.shutdown_executors()
+
+
+def test_run_in_process_runs_outside_the_event_loop_process():
+    assert asyncio.run(executors.run_in_process(worker_pid)) != os.getpid()
+
+
+def test_map_in_process_keeps_item_order_across_chunks():
+    items = list(range(11))
+    assert asyncio.run(executors.map_in_process(square_all, items, chunk_size=3)) == square_all(items)
+
+
+def test_heavy_tasks_are_capped_by_the_semaphore(monkeypatch):
+    # Threads stand in for worker processes so the jobs can be held open
+    monkeypatch.setattr(executors.settings, "EXECUTOR_MAX_HEAVY_TASKS", 2)
+    pool = ThreadPoolExecutor(max_workers=5)
+    monkeypatch.setattr(executors, "get_process_pool", lambda: pool)
+    release = threading.Event()
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def job():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+
+    async def run():
+        jobs = [asyncio.ensure_future(executors.run_in_process(job)) for _ in range(5)]
+        while running[0] < 2:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        queued = running[0]
+        release.set()
+        await asyncio.gather(*jobs)
+        return queued
+
+    try:
+        assert asyncio.run(run()) == 2
+        assert peak[0] == 2
+    finally:
+        pool.shutdown()
@@ -0,0 +1,137 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.services import index_refresh
+from app.services.profile_cards import ProfileCardStore
+from app.services.sharding import get_search_coordinator, set_search_coordinator
+
+MODEL = "text-embedding-ada-002@1536"
+START = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeProfiles:
+    """Stands in for the profiles and profile_embeddings tables"""
+
+    def __init__(self):
+        self.rows = {}
+        self.clock = START
+        self.embedding_queries = []
+
+    def write(self, name, vector, user_id=None):
+        self.clock += timedelta(seconds=1)
+        row = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id or str(uuid.uuid4()),
+            "full_name": name,
+            "updated_at": self.clock.isoformat(),
+            "embeddings": {MODEL: vector},
+        }
+        for existing in list(self.rows.values()):
+            if existing["user_id"] == row["user_id"]:
+                row["id"] = existing["id"]
+        self.rows[row["id"]] = row
+        return row["id"]
+
+    def _since(self, updated_since):
+        return [
+            row for row in self.rows.values()
+            if updated_since is None or datetime.fromisoformat(row["updated_at"]) >= datetime.fromisoformat(updated_since)
+        ]
+
+    def fetch_profiles_with_embeddings(self, embedding_model, updated_since=None):
+        self.embedding_queries.append((embedding_model, updated_since))
+        return [
+            dict({k: v for k, v in row.items() if k != "embeddings"}, embedding=row["embeddings"][embedding_model])
+            for row in self._since(updated_since) if embedding_model in row["embeddings"]
+        ]
+
+    def fetch_profile_cards(self, updated_since=None):
+        return [{k: v for k, v in row.items() if k != "embeddings"} for row in self._since(updated_since)]
+
+    def fetch_profile_ids(self):
+        return set(self.rows)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeProfiles()
+    settings = index_refresh.settings
+    monkeypatch.setattr(settings, "PROFILE_CARD_STORE_ENABLED", True)
+    monkeypatch.setattr(settings, "SEARCH_SHARD_COUNT", 2)
+    monkeypatch.setattr(settings, "SEARCH_SHARD_REPLICAS", 1)
+    monkeypatch.setattr(settings, "SEARCH_SHARD_TIMEOUT_SECONDS", 10.0)
+    monkeypatch.setattr(settings, "SEARCH_INDEX_REFRESH_OVERLAP_SECONDS", 5.0)
+    for name in ("fetch_profiles_with_embeddings", "fetch_profile_cards", "fetch_profile_ids"):
+        monkeypatch.setattr(index_refresh, name, getattr(database, name))
+    monkeypatch.setattr(index_refresh, "profile_card_store", ProfileCardStore())
+    monkeypatch.setattr(index_refresh, "get_active_embedding_model", lambda: MODEL)
+    yield database
+    coordinator = get_search_coordinator()
+    if coordinator:
+        coordinator.close()
+    set_search_coordinator(None)
+
+
+async def search_names(database, vector):
+    result = await get_search_coordinator().search(vector, match_count=10, match_threshold=0.0)
+    return [database.rows[row["id"]]["full_name"] for row in result.rows]
+
+
+def test_refresh_applies_only_new_writes_and_deletes(database):
+    kept = database.write("Kept", [1.0, 0.0])
+    doomed = database.write("Doomed", [1.0, 0.1])
+
+    async def run():
+        await index_refresh.load_profile_cards()
+        await index_refresh.start_search_coordinator()
+        coordinator = get_search_coordinator()
+
+        database.write("Renamed", [1.0, 0.0], user_id=database.rows[kept]["user_id"])
+        database.write("Added", [1.0, 0.2])
+        del database.rows[doomed]
+        await index_refresh.refresh_search_index()
+
+        assert get_search_coordinator() is coordinator  # patched in place, not rebuilt
+        return await search_names(database, [1.0, 0.0])
+
+    names = asyncio.run(run())
+
+    assert names == ["Renamed", "Added"]
+    assert sorted(index_refresh.profile_card_store.profile_ids()) == sorted(database.rows)
+    # The sync re-read a window before the newest update the shards held, not the whole table
+    assert database.embedding_queries[-1] == (MODEL, (START + timedelta(seconds=2 - 5)).isoformat())
+
+
+def test_model_change_rebuilds_and_catches_up_before_the_swap(database, monkeypatch):
+    database.write("Old", [1.0, 0.0])
+    new_model = "text-embedding-3-small@2"
+
+    async def run():
+        await index_refresh.start_search_coordinator()
+        old = get_search_coordinator()
+
+        for row in database.rows.values():
+            row["embeddings"][new_model] = [0.0, 1.0]
+        monkeypatch.setattr(index_refresh, "get_active_embedding_model", lambda: new_model)
+        build = index_refresh.build_search_coordinator
+
+        async def build_while_writing():
+            built = await build()
+            # Written after the new shards loaded their rows
+            profile_id = database.write("During rebuild", [1.0, 0.0])
+            database.rows[profile_id]["embeddings"][new_model] = [0.0, 1.0]
+            return built
+
+        monkeypatch.setattr(index_refresh, "build_search_coordinator", build_while_writing)
+        await index_refresh.refresh_search_index()
+        assert get_search_coordinator() is not old
+        old.close()
+        return get_search_coordinator().embedding_model, await search_names(database, [0.0, 1.0])
+
+    embedding_model, names = asyncio.run(run())
+
+    assert embedding_model == new_model
+    assert sorted(names) == ["During rebuild", "Old"]
@@ -0,0 +1,54 @@
+import uuid
+from datetime import datetime, timezone
+
+from app.services.profile_cards import ProfileCardStore
+
+UPDATED_AT = "2026-10-19T12:30:00+00:00"
+
+
+def card_row(name, **extra):
+    return dict({
+        "id": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "full_name": name,
+        "headline": "Engineer",
+        "created_at": UPDATED_AT,
+        "updated_at": UPDATED_AT,
+    }, **extra)
+
+
+def test_hydrated_cards_match_the_rows():
+    store = ProfileCardStore()
+    row = card_row("Ada")
+    store.upsert(row)
+
+    [result] = store.hydrate([(row["id"], 0.75)])
+
+    assert result.score == 0.75
+    assert result.profile.id == uuid.UUID(row["id"])
+    assert result.profile.user_id == uuid.UUID(row["user_id"])
+    assert result.profile.full_name == "Ada"
+    assert result.profile.headline == "Engineer"
+    assert result.profile.updated_at == datetime(2026, 10, 19, 12, 30, tzinfo=timezone.utc)
+    assert result.profile.summary is None
+
+
+def test_cached_profiles_are_invalidated_by_writes():
+    store = ProfileCardStore(profile_cache_size=1)
+    first, second = card_row("First"), card_row("Second")
+    store.upsert(first)
+    store.upsert(second)
+
+    assert store.hydrate([(first["id"], 1.0)])[0].profile is store.hydrate([(first["id"], 1.0)])[0].profile
+    store.upsert(dict(first, full_name="Renamed"))
+    assert store.hydrate([(first["id"], 1.0)])[0].profile.full_name == "Renamed"
+
+    # Evicts First from the one-entry cache
+    store.hydrate([(second["id"], 1.0)])
+    assert list(store._profiles) == [store.dense_id(second["id"])]
+
+    # A removed profile's dense id is reused; the new card must not see the old Profile
+    store.remove_user(second["user_id"])
+    third = card_row("Third")
+    store.upsert(third)
+    assert store.hydrate([(third["id"], 1.0)])[0].profile.full_name == "Third"
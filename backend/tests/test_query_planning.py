@@ -0,0 +1,166 @@
+import asyncio
+
+import pytest
+
+from app.services import query_planning
+from app.services.query_planning import (
+    FakeLLM,
+    LLMClient,
+    QueryPlanCache,
+    QueryPlanner,
+    default_fake_responders,
+)
+
+MODEL = "text-embedding-ada-002@1536"
+
+
+@pytest.fixture
+def embedding_calls(monkeypatch):
+    calls = []
+
+    async def fake_generate_embeddings(texts, model_tag=None):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    monkeypatch.setattr(query_planning, "generate_embeddings", fake_generate_embeddings)
+    return calls
+
+
+def make_planner(llm, ttl=60.0):
+    return QueryPlanner(llm, QueryPlanCache(max_size=16, ttl_seconds=ttl))
+
+
+def test_llm_client_is_abstract():
+    with pytest.raises(TypeError):
+        LLMClient()
+
+
+def test_prompts_run_concurrently(embedding_calls):
+    llm = FakeLLM(delay=0.01)
+    planner = make_planner(llm)
+
+    plan = asyncio.run(planner.plan("ML engineers in New York", MODEL))
+
+    assert len(llm.calls) == 3
+    # Every prompt was awaiting the model at the same time
+    assert llm.max_in_flight == 3
+    assert [phrase.key_phrase for phrase in plan.key_phrases] == ["ML engineers in New York"]
+    assert plan.traits == ["ML engineers in New York"]
+    assert not plan.degraded
+    # All key phrases are embedded in a single request
+    assert embedding_calls == [["ML engineers in New York"]]
+
+
+def test_cache_hit_skips_llm_and_embedding(embedding_calls):
+    llm = FakeLLM()
+    planner = make_planner(llm)
+
+    async def run():
+        first = await planner.plan("Stanford founders", MODEL)
+        second = await planner.plan("  stanford   FOUNDERS? ", MODEL)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert second is first
+    assert len(llm.calls) == 3
+    assert len(embedding_calls) == 1
+
+
+def test_cache_is_keyed_by_embedding_model(embedding_calls):
+    llm = FakeLLM()
+    planner = make_planner(llm)
+
+    async def run():
+        await planner.plan("Stanford founders", MODEL)
+        await planner.plan("Stanford founders", "text-embedding-3-small@512")
+
+    asyncio.run(run())
+
+    assert len(llm.calls) == 6
+
+
+def test_concurrent_requests_share_one_planning_run(embedding_calls):
+    llm = FakeLLM(delay=0.05)
+    planner = make_planner(llm)
+
+    async def run():
+        return await asyncio.gather(*(planner.plan("rust developers", MODEL) for _ in range(5)))
+
+    plans = asyncio.run(run())
+
+    assert all(plan is plans[0] for plan in plans)
+    assert len(llm.calls) == 3
+    assert len(embedding_calls) == 1
+    assert planner._in_flight == {}
+
+
+def test_cancelled_caller_does_not_cancel_shared_plan(embedding_calls):
+    llm = FakeLLM(delay=0.05)
+    planner = make_planner(llm)
+
+    async def run():
+        impatient = asyncio.ensure_future(planner.plan("rust developers", MODEL))
+        patient = asyncio.ensure_future(planner.plan("rust developers", MODEL))
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        return await patient
+
+    plan = asyncio.run(run())
+
+    assert plan.key_phrases[0].key_phrase == "rust developers"
+    assert len(llm.calls) == 3
+
+
+def test_degraded_plans_are_not_cached(embedding_calls):
+    responders = default_fake_responders()
+
+    def outage(user):
+        raise RuntimeError("model unavailable")
+
+    responders["Extract exact filters"] = outage
+    llm = FakeLLM(responders)
+    planner = make_planner(llm)
+
+    async def run():
+        first = await planner.plan("designers in Berlin", MODEL)
+        second = await planner.plan("designers in Berlin", MODEL)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first.degraded and second.degraded
+    assert first.filters == []
+    # The other prompts still contribute to the plan
+    assert first.key_phrases[0].key_phrase == "designers in Berlin"
+    assert second is not first
+    assert len(llm.calls) == 6
+
+
+def test_expired_plans_are_rebuilt(embedding_calls):
+    llm = FakeLLM()
+    planner = make_planner(llm, ttl=0.0)
+
+    async def run():
+        await planner.plan("data scientists", MODEL)
+        await asyncio.sleep(0.01)
+        await planner.plan("data scientists", MODEL)
+
+    asyncio.run(run())
+
+    assert len(llm.calls) == 6
+
+
+def test_traits_come_from_the_key_phrases(embedding_calls):
+    responders = default_fake_responders()
+    responders["generate key phrases"] = lambda user: {"key_phrases": [
+        {"key_phrase": "Columbia University", "corresponding_trait": "Graduated from Columbia", "relevant_section": "education"},
+        {"key_phrase": "Columbia alum", "corresponding_trait": "Graduated from Columbia", "relevant_section": "basic_info"},
+        {"key_phrase": "venture capital", "relevant_section": "experiences"},
+    ]}
+    responders["relevant_sections"] = lambda user: {"relevant_sections": ["basic_info", "education", "experiences"]}
+    planner = make_planner(FakeLLM(responders))
+
+    plan = asyncio.run(planner.plan("Columbia grads in VC", MODEL))
+
+    assert plan.traits == ["Graduated from Columbia", "venture capital"]
@@ -0,0 +1,169 @@
+import asyncio
+
+import pytest
+
+from app.services.quota import AdmissionController, OverloadedError, QuotaExceededError, SearchQuotaManager, _MonthlyUsage
+
+
+class FakeUsageTable:
+    """Stands in for search_limits and increment_user_search_counts"""
+
+    def __init__(self, used=0, limit=3):
+        self.used = used
+        self.limit = limit
+        self.reads = 0
+        self.writes = []
+        self.failures = 0
+
+    def fetch(self, user_id):
+        self.reads += 1
+        return _MonthlyUsage(self.used, self.limit)
+
+    def write(self, increments):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("rpc failed")
+        self.writes.append(dict(increments))
+
+
+@pytest.fixture
+def table():
+    return FakeUsageTable()
+
+
+@pytest.fixture
+def quota(table):
+    manager = SearchQuotaManager(rate_per_minute=6000, burst=100, default_monthly_limit=3,
+                                 flush_interval=60, refresh_interval=60)
+    manager._fetch_usage = table.fetch
+    manager._write_increments = table.write
+    return manager
+
+
+async def try_check(quota, user_id):
+    try:
+        await quota.check(user_id)
+        return True
+    except QuotaExceededError as e:
+        assert e.monthly
+        return False
+
+
+def test_concurrent_checks_never_exceed_the_monthly_limit(quota, table):
+    async def run():
+        return await asyncio.gather(*(try_check(quota, "u1") for _ in range(10)))
+
+    assert sum(asyncio.run(run())) == 3
+    assert table.reads == 1
+    asyncio.run(quota.flush())
+    assert table.writes == [{"u1": 3}]
+
+
+def test_refunds_net_out_before_the_flush(quota, table):
+    async def run():
+        await quota.check("u1")
+        await quota.check("u2")
+        await quota.check("u2")
+        quota.refund("u1")
+        quota.refund("u2")
+        await quota.flush()
+
+    asyncio.run(run())
+    assert table.writes == [{"u2": 1}]
+
+
+def test_failed_flush_is_retried_with_later_searches(quota, table):
+    table.failures = 1
+
+    async def run():
+        await quota.check("u1")
+        await quota.flush()
+        assert table.writes == []
+        await quota.check("u1")
+        await quota.flush()
+
+    asyncio.run(run())
+    assert table.writes == [{"u1": 2}]
+
+
+def test_idle_users_are_evicted_and_reloaded(quota, table):
+    async def run():
+        await quota.check("u1")
+        assert quota.evict_idle() == 0  # fresh usage and unflushed searches
+        await quota.flush()
+        quota._usage["u1"].loaded_at -= quota.refresh_interval
+        quota._buckets["u1"].tokens = quota.burst
+        assert quota.evict_idle() == 1
+        assert not quota._usage and not quota._buckets
+        table.used = 1  # the flushed search, as the database now has it
+        await quota.check("u1")
+
+    asyncio.run(run())
+    assert table.reads == 2
+    assert quota._usage["u1"].searches_this_month == 2
+
+
+def test_rate_limited_users_are_not_evicted(quota, table):
+    async def run():
+        await quota.check("u1")
+        await quota.flush()
+        quota._usage["u1"].loaded_at -= quota.refresh_interval
+        return quota.evict_idle()
+
+    assert asyncio.run(run()) == 0
+
+
+async def hold(controller, priority, entered, release):
+    async with controller.admit(priority):
+        entered.append(priority)
+        await release.wait()
+
+
+def test_full_queue_sheds_the_lowest_priority_entry():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=1)
+        release = asyncio.Event()
+        entered = []
+        running = asyncio.ensure_future(hold(controller, 0, entered, release))
+        await asyncio.sleep(0)
+        low = asyncio.ensure_future(hold(controller, 1, entered, release))
+        await asyncio.sleep(0)
+        high = asyncio.ensure_future(hold(controller, 0, entered, release))
+        await asyncio.sleep(0)
+        # A second low-priority arrival cannot displace the queued high-priority one
+        with pytest.raises(OverloadedError):
+            await hold(controller, 1, entered, release)
+        release.set()
+        await running
+        await high
+        with pytest.raises(OverloadedError):
+            await low
+        return entered, controller._active
+
+    entered, active = asyncio.run(run())
+    assert entered == [0, 0]
+    assert active == 0
+
+
+def test_slot_handed_to_a_cancelled_waiter_passes_on():
+    async def run():
+        controller = AdmissionController(max_concurrent=1, max_queue=4)
+        entered = []
+        release = asyncio.Event()
+        await controller._acquire(0)
+        cancelled = asyncio.ensure_future(hold(controller, 0, entered, release))
+        waiting = asyncio.ensure_future(hold(controller, 1, entered, release))
+        await asyncio.sleep(0)
+        # Hand the slot to the first waiter and cancel it before it runs
+        controller._release()
+        cancelled.cancel()
+        release.set()
+        await asyncio.wait_for(waiting, 5)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return entered, controller._active, controller._queue
+
+    entered, active, queue = asyncio.run(run())
+    assert entered == [1]
+    assert active == 0
+    assert queue == []
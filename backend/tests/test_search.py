@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+
+import pytest
+
+from app.services import executors, search
+from app.services.profile_cards import ProfileCardStore
+
+
+def profile_row(name, **extra):
+    return dict({"id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "full_name": name}, **extra)
+
+
+def result_ids(results):
+    return [str(result.profile.id) for result in results]
+
+
+@pytest.fixture
+def card_store(monkeypatch):
+    store = ProfileCardStore()
+    monkeypatch.setattr(search, "profile_card_store", store)
+    return store
+
+
+@pytest.fixture
+def fetched_ids(monkeypatch):
+    fetched = []
+
+    def fetch_profiles_by_ids(profile_ids):
+        fetched.append(list(profile_ids))
+        return [profile_row("Fetched", id=profile_id, summary="from supabase") for profile_id in profile_ids[:1]]
+
+    monkeypatch.setattr(search, "fetch_profiles_by_ids", fetch_profiles_by_ids)
+    return fetched
+
+
+def test_full_rows_are_hydrated_as_they_are(card_store, fetched_ids):
+    row = profile_row("Full", summary="kept", raw_profile_data={"a": 1}, similarity=0.9)
+    card_store.upsert(dict(row, full_name="Card"))
+
+    results = asyncio.run(search.hydrate_results([row]))
+
+    assert [(result.profile.full_name, result.profile.summary) for result in results] == [("Full", "kept")]
+    assert result_ids(results) == [row["id"]]
+    assert fetched_ids == []
+
+
+def test_mixed_row_shapes_keep_rank_order(card_store, fetched_ids):
+    # A profile upserted with its full row can rank above id-only rows from the initial load
+    full = profile_row("Full", summary="kept", similarity=0.95)
+    carded = profile_row("Carded")
+    card_store.upsert(carded)
+    unknown = profile_row("Unknown")
+    deleted = profile_row("Deleted")
+    rows = [
+        full,
+        {"id": carded["id"], "user_id": carded["user_id"], "similarity": 0.9},
+        {"id": unknown["id"], "user_id": unknown["user_id"], "similarity": 0.8},
+        {"id": deleted["id"], "user_id": deleted["user_id"], "similarity": 0.7},
+    ]
+
+    results = asyncio.run(search.hydrate_results(rows))
+
+    assert [result.profile.full_name for result in results] == ["Full", "Carded", "Fetched"]
+    assert [result.score for result in results] == [0.95, 0.9, 0.8]
+    assert results[0].profile.summary == "kept"
+    # Only the ids the card store does not know are fetched; the deleted one is dropped
+    assert fetched_ids == [[unknown["id"], deleted["id"]]]
+
+
+def test_large_result_sets_are_hydrated_on_the_process_pool(monkeypatch):
+    monkeypatch.setattr(search.settings, "HYDRATION_OFFLOAD_THRESHOLD", 3)
+    monkeypatch.setattr(search.settings, "HYDRATION_CHUNK_SIZE", 2)
+    chunks = []
+
+    async def map_in_process(fn, items, chunk_size):
+        chunks.append(chunk_size)
+        return await real_map_in_process(fn, items, chunk_size)
+
+    real_map_in_process = search.map_in_process
+    monkeypatch.setattr(search, "map_in_process", map_in_process)
+    rows = [profile_row(f"P{i}", similarity=1 - i / 10) for i in range(5)]
+
+    try:
+        results = asyncio.run(search.hydrate_results(rows))
+    finally:
+        executors.shutdown_executors()
+    assert chunks == [2]
+    assert result_ids(results) == [row["id"] for row in rows]
+    # Below the threshold the rows are hydrated inline
+    asyncio.run(search.hydrate_results(rows[:2]))
+    assert chunks == [2]
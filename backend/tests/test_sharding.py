@@ -0,0 +1,239 @@
+import asyncio
+import math
+import random
+import uuid
+
+import pytest
+
+from app.services.sharding import (
+    IndexShard,
+    ShardedSearchCoordinator,
+    build_local_coordinator,
+    partition_rows,
+    shard_for,
+)
+
+
+def make_rows(count, dims=8, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "user_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "full_name": f"Profile {index}",
+            "embedding": [rng.uniform(-1, 1) for _ in range(dims)],
+        }
+        for index in range(count)
+    ]
+
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b)) / (math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b)))
+
+
+def brute_force(rows, query, match_count, match_threshold):
+    scored = [(cosine(query, row["embedding"]), row["id"]) for row in rows]
+    scored = [item for item in scored if item[0] > match_threshold]
+    return sorted(scored, reverse=True)[:match_count]
+
+
+@pytest.fixture
+def rows():
+    return make_rows(300)
+
+
+@pytest.fixture
+def coordinator(rows):
+    coordinator = build_local_coordinator(rows, shard_count=3, replicas=2, shard_timeout=10.0, hedge_after=None)
+    yield coordinator
+    coordinator.close()
+
+
+class FakeReplica:
+    """Stands in for a shard process: answers after delay, or raises error"""
+
+    def __init__(self, rows=None, delay=0.0, error=None):
+        self.rows = rows or []
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+        self.cancelled = 0
+
+    async def call(self, fn, *args):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return self.rows
+
+    def close(self):
+        pass
+
+
+def fake_shard(shard_id, *replicas):
+    shard = IndexShard(shard_id, [], replicas=1)
+    shard.close()
+    shard.replicas = list(replicas)
+    return shard
+
+
+def test_shard_placement_is_stable_and_complete(rows):
+    partitions = partition_rows(rows, 4)
+    assert sum(len(partition) for partition in partitions) == len(rows)
+    for shard_id, partition in enumerate(partitions):
+        assert all(shard_for(row["id"], 4) == shard_id for row in partition)
+
+
+def test_merged_results_match_brute_force(rows, coordinator):
+    rng = random.Random(1)
+    queries = [[rng.uniform(-1, 1) for _ in range(8)] for _ in range(5)]
+
+    async def run():
+        assert await coordinator.warm_up() == len(rows)
+        return [await coordinator.search(query, match_count=10, match_threshold=0.0) for query in queries]
+
+    for query, result in zip(queries, asyncio.run(run())):
+        expected = brute_force(rows, query, 10, 0.0)
+        assert not result.is_partial
+        assert [row["id"] for row in result.rows] == [profile_id for _, profile_id in expected]
+        for row, (similarity, _) in zip(result.rows, expected):
+            assert row["similarity"] == pytest.approx(similarity)
+            assert "embedding" not in row
+
+
+def test_upsert_and_remove_user(rows, coordinator):
+    query = [1.0] + [0.0] * 7
+    new_row = dict(make_rows(1, seed=99)[0], embedding=query)
+
+    async def run():
+        await coordinator.upsert_profile(new_row)
+        added = await coordinator.search(query, match_count=1, match_threshold=0.0)
+        await coordinator.remove_user(new_row["user_id"])
+        removed = await coordinator.search(query, match_count=1, match_threshold=0.0)
+        return added, removed
+
+    added, removed = asyncio.run(run())
+    assert added.rows[0]["id"] == new_row["id"]
+    assert removed.rows[0]["id"] != new_row["id"]
+
+
+def test_slow_shard_is_dropped_from_a_partial_result():
+    fast = [{"id": "a", "similarity": 0.9}, {"id": "b", "similarity": 0.6}]
+    other = [{"id": "c", "similarity": 0.8}]
+    slow = FakeReplica([{"id": "z", "similarity": 0.99}], delay=5.0)
+    coordinator = ShardedSearchCoordinator(
+        [fake_shard(0, FakeReplica(fast)), fake_shard(1, slow), fake_shard(2, FakeReplica(other))],
+        shard_timeout=0.1,
+        hedge_after=None,
+    )
+
+    async def run():
+        result = await coordinator.search([1.0, 0.0], match_count=10)
+        await asyncio.sleep(0.01)
+        # Checked before asyncio.run() cancels whatever is left at shutdown
+        return result, slow.cancelled
+
+    result, cancelled = asyncio.run(run())
+
+    assert result.is_partial
+    assert result.failed_shards == [1]
+    assert [row["id"] for row in result.rows] == ["a", "c", "b"]
+    # The abandoned request was cancelled, not left running
+    assert cancelled == 1
+
+
+def test_failing_shard_is_dropped_from_a_partial_result():
+    coordinator = ShardedSearchCoordinator(
+        [fake_shard(0, FakeReplica([{"id": "a", "similarity": 0.9}])),
+         fake_shard(1, FakeReplica(error=RuntimeError("worker died")))],
+        shard_timeout=1.0,
+        hedge_after=None,
+    )
+
+    result = asyncio.run(coordinator.search([1.0, 0.0]))
+
+    assert result.failed_shards == [1]
+    assert [row["id"] for row in result.rows] == ["a"]
+
+
+def test_slow_primary_is_hedged_to_another_replica():
+    primary = FakeReplica([{"id": "slow", "similarity": 0.5}], delay=5.0)
+    secondary = FakeReplica([{"id": "fast", "similarity": 0.5}])
+    shard = fake_shard(0, primary, secondary)
+
+    async def run():
+        rows = await shard.top_k([1.0], 10, 0.0, hedge_after=0.05)
+        await asyncio.sleep(0.01)
+        return rows, primary.cancelled
+
+    rows, cancelled = asyncio.run(run())
+
+    # The 5s primary would have answered "slow"
+    assert [row["id"] for row in rows] == ["fast"]
+    assert cancelled == 1
+
+
+def test_fast_primary_is_not_hedged():
+    primary = FakeReplica([{"id": "primary", "similarity": 0.5}])
+    secondary = FakeReplica([{"id": "secondary", "similarity": 0.5}])
+    shard = fake_shard(0, primary, secondary)
+
+    rows = asyncio.run(shard.top_k([1.0], 10, 0.0, hedge_after=0.5))
+
+    assert [row["id"] for row in rows] == ["primary"]
+    assert secondary.calls == 0
+
+
+def test_failed_primary_falls_back_to_hedge():
+    primary = FakeReplica(error=RuntimeError("worker died"))
+    secondary = FakeReplica([{"id": "secondary", "similarity": 0.5}], delay=0.05)
+    shard = fake_shard(0, primary, secondary)
+
+    rows = asyncio.run(shard.top_k([1.0], 10, 0.0, hedge_after=0.01))
+
+    assert [row["id"] for row in rows] == ["secondary"]
+
+
+def test_every_replica_failing_raises():
+    shard = fake_shard(0, FakeReplica(error=RuntimeError("first")), FakeReplica(error=RuntimeError("second")))
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(shard.top_k([1.0], 10, 0.0, hedge_after=0.01))
+
+
+def test_timeout_cancels_outstanding_hedges():
+    replicas = [FakeReplica(delay=5.0), FakeReplica(delay=5.0)]
+    coordinator = ShardedSearchCoordinator([fake_shard(0, *replicas)], shard_timeout=0.2, hedge_after=0.05)
+
+    async def run():
+        result = await coordinator.search([1.0, 0.0])
+        await asyncio.sleep(0.01)
+        return result, [replica.cancelled for replica in replicas]
+
+    result, cancelled = asyncio.run(run())
+
+    assert result.failed_shards == [0]
+    assert result.rows == []
+    assert [replica.calls for replica in replicas] == [1, 1]
+    assert cancelled == [1, 1]
+
+
+def test_upsert_profiles_moves_a_user_and_remove_profiles(rows, coordinator):
+    query = [1.0] + [0.0] * 7
+    moved = dict(make_rows(1, seed=98)[0], user_id=rows[0]["user_id"], embedding=query)
+
+    async def run():
+        await coordinator.upsert_profiles([moved])
+        ids = await coordinator.profile_ids()
+        await coordinator.remove_profiles([moved["id"], rows[1]["id"]])
+        return ids, await coordinator.profile_ids()
+
+    ids, remaining = asyncio.run(run())
+    # The user's old profile is dropped wherever it lived
+    assert moved["id"] in ids and rows[0]["id"] not in ids
+    assert len(ids) == len(rows)
+    assert remaining == ids - {moved["id"], rows[1]["id"]}
@@ -11,7 +11,10 @@ import {
   Project,
 } from "@/types/types";
 import { createClient, PostgrestError } from "@supabase/supabase-js";
-import { generate_embedding } from "@/utilities/generate-embeddings";
+import {
+  generate_embedding,
+  get_embedding_models,
+} from "@/utilities/generate-embeddings";
 import { chunkProfile } from "@/lib/server/profile-chunking";
 import { cookies } from "next/headers";
 import { isValidReferralCode } from "@/lib/referral";
@@ -174,21 +177,53 @@ export async function POST(request: NextRequest) {
           "Generating embedding for " + profile.full_name,
           "embedding"
         );
-        const embedding = await generate_embedding(raw_profile_data);
+        // Embed with every model searches need: the active one, plus the
+        // shadow one while the backend is migrating to it
+        const embedding_models = await get_embedding_models();
+        const embeddings = await Promise.all(
+          embedding_models.map((model) =>
+            generate_embedding(raw_profile_data, model)
+          )
+        );
+
+        // Generate chunks up front so they are written with the profile
+        sendUpdate(
+          "progress",
+          "Generating profile chunks...",
+          "generating_chunks"
+        );
+        const chunks = await chunkProfile(profile);
 
         try {
-          // Store the profile in Supabase
+          // Store the profile, its embeddings and its chunks in one transaction
           sendUpdate(
             "progress",
             "Storing profile data for " + profile.full_name,
             "storing_profile"
           );
-          const { data: profileData, error: insertError } = await supabase
-            .from("profiles")
-            .insert(profile)
-            .select()
-            .single();
-          if (insertError) {
+          const { data: stored, error: storeError } = await supabase
+            .rpc("upsert_profiles_with_embeddings", {
+              payload: [
+                {
+                  profile,
+                  // One vector per model tag
+                  embeddings: Object.fromEntries(
+                    embedding_models.map((model, index) => [
+                      model,
+                      embeddings[index],
+                    ])
+                  ),
+                  chunks: chunks.map((chunk) => ({
+                    chunk_type: chunk.chunk_type,
+                    content: chunk.content,
+                    embedding: chunk.embedding,
+                  })),
+                },
+              ],
+            })
+            .single<{ stored_profile_id: string; stored_user_id: string }>();
+          if (storeError || !stored) {
+            console.error("Failed to store profile:", storeError);
             sendUpdate(
               "error",
               "Failed to store profile data for " + profile.full_name,
@@ -197,34 +232,8 @@ export async function POST(request: NextRequest) {
             controller.close();
             return;
           }
-
-          // Create embedding data with the correct profile_id
-          const validatedEmbedding = {
-            id: crypto.randomUUID(),
-            profile_id: profileData.id, // Use the actual profile ID
-            embedding: embedding,
-            embedding_model: "openai",
-            created_at: now,
-          };
-
-          // Store the embedding
-          sendUpdate(
-            "progress",
-            "Storing embedding data...",
-            "storing_embedding"
-          );
-          const { error: embeddingError } = await supabase
-            .from("profile_embeddings")
-            .insert(validatedEmbedding);
-          if (embeddingError) {
-            sendUpdate(
-              "error",
-              "Failed to store embedding data",
-              "storing_embedding"
-            );
-            controller.close();
-            return;
-          }
+          // An existing profile for this user keeps its id
+          const stored_profile_id = stored.stored_profile_id;
 
           // --- Start: Insert related profile data ---
 
@@ -336,7 +345,7 @@ export async function POST(request: NextRequest) {
             "experience",
             proxycurl_linkedin_profile?.experiences || [],
             (exp) => ({
-              profile_id: profileData.id,
+              profile_id: stored_profile_id,
               company: exp.company,
               title: exp.title,
               starts_at_day: exp.start_at?.day,
@@ -363,7 +372,7 @@ export async function POST(request: NextRequest) {
             "education",
             proxycurl_linkedin_profile?.education || [],
             (edu) => ({
-              profile_id: profileData.id,
+              profile_id: stored_profile_id,
               school: edu.school,
               degree_name: edu.degree_name,
               field_of_study: edu.field_of_study,
@@ -391,7 +400,7 @@ export async function POST(request: NextRequest) {
             "skills",
             proxycurl_linkedin_profile?.skills || [],
             (skill) => ({
-              profile_id: profileData.id,
+              profile_id: stored_profile_id,
               skill: skill,
             }),
             (skill) => `${skill}`
@@ -406,7 +415,7 @@ export async function POST(request: NextRequest) {
             "certifications",
             proxycurl_linkedin_profile?.certifications || [],
             (cert) => ({
-              profile_id: profileData.id,
+              profile_id: stored_profile_id,
               name: cert.name,
             }),
             (cert) => cert.name || ""
@@ -421,7 +430,7 @@ export async function POST(request: NextRequest) {
             "projects",
             proxycurl_linkedin_profile?.accomplishment_projects || [],
             (proj) => ({
-              profile_id: profileData.id,
+              profile_id: stored_profile_id,
               title: proj.title,
               description: proj.description,
               url: proj.url,
@@ -435,31 +444,6 @@ export async function POST(request: NextRequest) {
             (proj) => proj.title || ""
           );
 
-          // Generate and store chunks
-          sendUpdate(
-            "progress",
-            "Generating profile chunks...",
-            "generating_chunks"
-          );
-          const chunks = await chunkProfile(profile);
-
-          sendUpdate("progress", "Storing profile chunks...", "storing_chunks");
-          const { error: chunksError } = await supabase
-            .from("profile_chunks")
-            .upsert(
-              chunks.map((chunk) => ({
-                profile_id: profile.id,
-                chunk_type: chunk.chunk_type,
-                content: chunk.content,
-                embedding: chunk.embedding,
-              })),
-              { onConflict: "profile_id,chunk_type" }
-            );
-
-          if (chunksError) {
-            console.error("Failed to store profile chunks:", chunksError);
-          }
-
           // Return success response
           // const response = {
           //   success: true,
@@ -1,7 +1,14 @@
 import { NextRequest, NextResponse } from "next/server";
+import { auth } from "@/auth";
 
 export async function POST(request: NextRequest) {
   try {
+    // The backend meters searches per user, so it needs to know who is asking
+    const session = await auth();
+    if (!session?.supabaseAccessToken) {
+      return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+    }
+
     // Parse the request body
     const body = await request.json();
 
@@ -11,14 +18,20 @@ export async function POST(request: NextRequest) {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
+        Authorization: `Bearer ${session.supabaseAccessToken}`,
       },
       body: JSON.stringify(body),
     });
 
     // Check if the response is ok
     if (!response.ok) {
+      // 403 = monthly limit reached, 429 = searching too fast, 503 = backend busy
+      const errorData = await response.json().catch(() => ({}));
       return NextResponse.json(
-        { error: "Failed to perform semantic search" },
+        {
+          error: errorData.detail || "Failed to perform semantic search",
+          limitReached: response.status === 403,
+        },
         { status: response.status }
       );
     }
@@ -88,6 +88,9 @@ function SearchPageContent() {
       setThinkingSteps([]);
 
       // --- Increment Usage and Check Limit ---
+      // This meters the search served by /api/search below. Searches proxied
+      // to the backend (/api/semantic-search) are counted by the backend
+      // itself and must not call incrementUsage as well.
       let canSearch = false;
       try {
         canSearch = await incrementUsage();
@@ -1,22 +1,53 @@
 import { RawProfile } from "../types/types";
 import OpenAI from "openai";
+import { createClient } from "@supabase/supabase-js";
 
-export async function generate_embedding(query: string | RawProfile) {
+// Every vector written before embeddings were versioned is ada-002; the
+// backend falls back to the same tag when embedding_model_state is unreadable
+const SEEDED_EMBEDDING_MODEL = "text-embedding-ada-002@1536";
+
+/**
+ * Model tags ("<model>@<dimensions>") a new profile has to be embedded with:
+ * the model serving searches and, while its index is being backfilled, the
+ * shadow model the backend will cut over to
+ */
+export async function get_embedding_models(): Promise<string[]> {
+  const supabase = createClient(
+    process.env.NEXT_PUBLIC_SUPABASE_URL!,
+    process.env.SUPABASE_SERVICE_ROLE_KEY!
+  ).schema("linkedin_profiles");
+
+  const { data, error } = await supabase
+    .from("embedding_model_state")
+    .select("active_model, shadow_model")
+    .eq("id", 1)
+    .single();
+
+  if (error || !data) {
+    console.error("Failed to read embedding_model_state:", error);
+    return [SEEDED_EMBEDDING_MODEL];
+  }
+  return [data.active_model, data.shadow_model].filter(
+    (model): model is string => Boolean(model)
+  );
+}
+
+export async function generate_embedding(
+  query: string | RawProfile,
+  model_tag: string = SEEDED_EMBEDDING_MODEL
+) {
   const openai = new OpenAI({
     apiKey: process.env.OPENAI_API_KEY,
   });
 
-  if (typeof query === "string") {
-    const embedding = await openai.embeddings.create({
-      model: "text-embedding-ada-002",
-      input: query,
-    });
-    return embedding.data[0].embedding;
-  } else {
-    const embedding = await openai.embeddings.create({
-      model: "text-embedding-ada-002",
-      input: JSON.stringify(query),
-    });
-    return embedding.data[0].embedding;
-  }
+  const [model, dimensions] = model_tag.split("@");
+  const embedding = await openai.embeddings.create({
+    model: model,
+    input: typeof query === "string" ? query : JSON.stringify(query),
+    // Only the text-embedding-3 models accept a shortened output size
+    ...(model.startsWith("text-embedding-3")
+      ? { dimensions: Number(dimensions) }
+      : {}),
+  });
+  return embedding.data[0].embedding;
 }
@@ -0,0 +1,21 @@
+-- Batched form of usage_tracking.increment_user_search_count, used by the
+-- backend's in-memory search quota to write back many users' counts at once.
+-- Adds increments_param[i] to user_ids_param[i]'s search count.
+CREATE OR REPLACE FUNCTION usage_tracking.increment_user_search_counts(
+    user_ids_param UUID[],
+    increments_param INTEGER[]
+)
+RETURNS void AS $$
+BEGIN
+    INSERT INTO usage_tracking.search_limits (user_id, searches_this_month, monthly_search_limit)
+    SELECT batch.user_id, batch.increment, 50 -- Default limit for new users
+    FROM unnest(user_ids_param, increments_param) AS batch(user_id, increment)
+    ON CONFLICT (user_id)
+    DO UPDATE SET
+        searches_this_month = usage_tracking.search_limits.searches_this_month + EXCLUDED.searches_this_month,
+        updated_at = NOW();
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+-- Grant execute permission to service role
+GRANT EXECUTE ON FUNCTION usage_tracking.increment_user_search_counts(UUID[], INTEGER[]) TO service_role;